@@ -2,76 +2,202 @@
 """
 Markdown Linting Fixer for ScoutVision Repository
 Fixes common markdown linting issues automatically.
+
+Usage:
+    python fix_markdown.py [ROOT] [--check] [--diff] [--workers N] [--no-cache]
+
+Files are fixed in a worker pool. A content-hash cache skips files that were
+already clean on the last run, and --check/--diff report without writing, so
+the tool can run as a pre-commit step.
 """
 
+import argparse
+import difflib
+import hashlib
+import json
 import os
 import re
-import glob
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-def fix_markdown_file(file_path):
-    """Fix common markdown linting issues in a single file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    original_content = content
-    
+CACHE_FILENAME = ".fix_markdown_cache.json"
+SKIP_DIRS = {".git", "node_modules", "bin", "obj", "venv", ".venv", "__pycache__"}
+
+# Rules applied in order: (lint rule, compiled pattern, replacement)
+RULES = [
     # Fix MD022: Add blank lines around headings
-    content = re.sub(r'([^\n])\n(#{1,6}\s)', r'\1\n\n\2', content)
-    content = re.sub(r'(#{1,6}.*)\n([^#\n])', r'\1\n\n\2', content)
-    
+    ("MD022", re.compile(r'([^\n])\n(#{1,6}\s)'), r'\1\n\n\2'),
+    ("MD022", re.compile(r'(#{1,6}.*)\n([^#\n])'), r'\1\n\n\2'),
+
     # Fix MD032: Add blank lines around lists
-    content = re.sub(r'([^\n])\n([-*]\s)', r'\1\n\n\2', content)
-    content = re.sub(r'([^\n])\n(\d+\.\s)', r'\1\n\n\2', content)
-    content = re.sub(r'([-*]\s.*)\n([^-*\s\n])', r'\1\n\n\2', content)
-    content = re.sub(r'(\d+\.\s.*)\n([^\d\s\n])', r'\1\n\n\2', content)
-    
+    ("MD032", re.compile(r'([^\n])\n([-*]\s)'), r'\1\n\n\2'),
+    ("MD032", re.compile(r'([^\n])\n(\d+\.\s)'), r'\1\n\n\2'),
+    ("MD032", re.compile(r'([-*]\s.*)\n([^-*\s\n])'), r'\1\n\n\2'),
+    ("MD032", re.compile(r'(\d+\.\s.*)\n([^\d\s\n])'), r'\1\n\n\2'),
+
     # Fix MD031: Add blank lines around fenced code blocks
-    content = re.sub(r'([^\n])\n(```)', r'\1\n\n\2', content)
-    content = re.sub(r'(```[^\n]*)\n([^`\n])', r'\1\n\n\2', content)
-    
+    ("MD031", re.compile(r'([^\n])\n(```)'), r'\1\n\n\2'),
+    ("MD031", re.compile(r'(```[^\n]*)\n([^`\n])'), r'\1\n\n\2'),
+
     # Fix MD034: Wrap bare URLs in angle brackets
-    content = re.sub(r'(\s)(https?://[^\s<>]+)(\s)', r'\1<\2>\3', content)
-    
+    ("MD034", re.compile(r'(\s)(https?://[^\s<>]+)(\s)'), r'\1<\2>\3'),
+
     # Fix MD009: Remove trailing spaces
-    content = re.sub(r' +\n', '\n', content)
-    
+    ("MD009", re.compile(r' +\n'), '\n'),
+
     # Fix MD040: Add language to fenced code blocks without language
-    content = re.sub(r'\n```\n', '\n```text\n', content)
-    
+    ("MD040", re.compile(r'\n```\n'), '\n```text\n'),
+
     # Fix MD036: Replace emphasis used as heading
-    content = re.sub(r'\*\*(.*)\*\*\n(?=\n)', r'## \1\n', content)
-    
+    ("MD036", re.compile(r'\*\*(.*)\*\*\n(?=\n)'), r'## \1\n'),
+
     # Clean up multiple consecutive blank lines
-    content = re.sub(r'\n{3,}', '\n\n', content)
-    
-    # Only write if content changed
-    if content != original_content:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
-
-def main():
-    """Fix markdown files in the repository."""
-    repo_root = r"c:\Users\Admin\Documents\GitHub\ScoutVision"
-    
-    # Find all markdown files
+    ("MD012", re.compile(r'\n{3,}'), '\n\n'),
+]
+
+# Rules can create input for earlier rules (MD036 turns emphasis into a heading
+# that MD022 then needs to space), so they are reapplied until the text settles
+MAX_PASSES = 10
+
+# Changes whenever the rule table or pass limit does, invalidating cached results
+RULES_HASH = hashlib.sha256(
+    "\n".join([f"passes\t{MAX_PASSES}"] +
+              [f"{name}\t{pattern.pattern}\t{repl}" for name, pattern, repl in RULES]).encode()
+).hexdigest()
+
+def apply_rules(content):
+    """Apply every rule once, in order."""
+    for _, pattern, repl in RULES:
+        content = pattern.sub(repl, content)
+    return content
+
+def fix_markdown_until_stable(content):
+    """
+    Reapply the rules until the text stops changing.
+    Returns (fixed, stable) where stable is False if MAX_PASSES was not enough.
+    """
+    for _ in range(MAX_PASSES):
+        fixed = apply_rules(content)
+        if fixed == content:
+            return fixed, True
+        content = fixed
+    return content, False
+
+def fix_markdown_content(content):
+    """Apply the rules to markdown text until it is clean and return the fixed text."""
+    return fix_markdown_until_stable(content)[0]
+
+def file_hash(file_path):
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def fix_markdown_file(file_path, write=True):
+    """
+    Fix common markdown linting issues in a single file.
+    Returns (changed, file_hash, diff) where file_hash is taken after any write,
+    or None if the rules did not settle and the result must not be cached.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    fixed, stable = fix_markdown_until_stable(content)
+    changed = fixed != content
+    diff = ""
+
+    if changed:
+        if write:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(fixed)
+        else:
+            diff = "".join(difflib.unified_diff(
+                content.splitlines(keepends=True), fixed.splitlines(keepends=True),
+                fromfile=file_path, tofile=file_path))
+
+    return changed, file_hash(file_path) if stable else None, diff
+
+def find_markdown_files(repo_root):
     md_files = []
     for root, dirs, files in os.walk(repo_root):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
         for file in files:
             if file.endswith('.md'):
                 md_files.append(os.path.join(root, file))
-    
-    fixed_files = []
+    return sorted(md_files)
+
+def load_cache(repo_root):
+    try:
+        with open(os.path.join(repo_root, CACHE_FILENAME), 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if cache.get("rules") != RULES_HASH:
+        return {}
+    return cache.get("files", {})
+
+def save_cache(repo_root, files):
+    with open(os.path.join(repo_root, CACHE_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump({"rules": RULES_HASH, "files": files}, f, indent=2, sort_keys=True)
+
+def main(argv=None):
+    """Fix markdown files in the repository."""
+    parser = argparse.ArgumentParser(description="Fix common markdown lint issues")
+    parser.add_argument("root", nargs="?", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="repository root to scan (default: this script's directory)")
+    parser.add_argument("--check", action="store_true", help="report files needing fixes without writing")
+    parser.add_argument("--diff", action="store_true", help="print a unified diff of fixes without writing")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="process every file, ignoring the cache")
+    args = parser.parse_args(argv)
+
+    repo_root = os.path.abspath(args.root)
+    write = not (args.check or args.diff)
+    cache = {} if args.no_cache else load_cache(repo_root)
+
+    # Find all markdown files, skipping those unchanged since the last clean run
+    md_files = find_markdown_files(repo_root)
+    pending = []
     for file_path in md_files:
-        try:
-            if fix_markdown_file(file_path):
-                fixed_files.append(file_path)
-                print(f"Fixed: {file_path}")
-        except Exception as e:
-            print(f"Error fixing {file_path}: {e}")
-    
-    print(f"\nFixed {len(fixed_files)} files out of {len(md_files)} markdown files.")
+        rel_path = os.path.relpath(file_path, repo_root)
+        if cache.get(rel_path) == file_hash(file_path):
+            continue
+        pending.append(file_path)
+
+    fixed_files = []
+    errors = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(fix_markdown_file, file_path, write) for file_path in pending]
+            for file_path, future in zip(pending, futures):
+                rel_path = os.path.relpath(file_path, repo_root)
+                try:
+                    changed, new_hash, diff = future.result()
+                except Exception as e:
+                    print(f"Error fixing {file_path}: {e}")
+                    cache.pop(rel_path, None)
+                    errors += 1
+                    continue
+
+                if changed:
+                    fixed_files.append(file_path)
+                    if args.diff:
+                        sys.stdout.write(diff)
+                    else:
+                        print(f"{'Fixed' if write else 'Needs fixing'}: {file_path}")
+                if new_hash is not None and (write or not changed):
+                    cache[rel_path] = new_hash
+                else:
+                    cache.pop(rel_path, None)
+
+    if write and not args.no_cache:
+        save_cache(repo_root, cache)
+
+    verb = "Fixed" if write else "Found"
+    print(f"\n{verb} {len(fixed_files)} files out of {len(md_files)} markdown files "
+          f"({len(md_files) - len(pending)} unchanged since last clean run).")
+
+    if errors or (fixed_files and not write):
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -7,6 +7,14 @@ Enhancements include:
 - Professional color grading
 - Soft glow effect for emphasis
 
+All three enhancements run as one ffmpeg filter graph, so each asset is decoded and
+encoded once with no intermediate files. Batch mode processes a directory of assets
+across a process pool and skips outputs that are already up to date.
+
+Usage:
+    python scoutvision_logo_enhancer.py                      # enhance the logo video
+    python scoutvision_logo_enhancer.py --batch assets/ -o enhanced/ [--workers 4] [--force]
+
 Requirements:
 - Python 3.x
 - ffmpeg installed and available in system PATH
@@ -15,66 +23,162 @@ Author: Demond Balentine
 Date: 6/20/2025
 """
 
+import argparse
+import hashlib
+import json
+import os
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Define file paths
 INPUT_PATH = "scoutvision/assets/logo/scoutvision-logo.mp4"
-UPSCALED_PATH = "scoutvision/assets/logo/scoutvision-logo-upscaled.mp4"
-GRADED_PATH = "scoutvision/assets/logo/scoutvision-logo-graded.mp4"
 ENHANCED_PATH = "scoutvision/assets/logo/scoutvision-logo-enhanced.mp4"
 
+# Filter parameters; changing any of these invalidates cached outputs
+UPSCALE_FILTER = "scale=iw*2:ih*2:flags=lanczos"
+COLOR_GRADE_FILTER = "eq=contrast=1.25:saturation=1.6:brightness=0.07"
+GLOW_BLUR_FILTER = "boxblur=15:1"
+GLOW_BLEND_FILTER = "blend=all_mode='lighten':opacity=0.5"
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm", ".avi")
+CACHE_FILENAME = ".enhance-cache.json"
+
+def build_filter_graph():
+    """
+    Combine upscaling, color grading and glow into a single filter graph.
+    """
+    return (
+        f"[0:v]{UPSCALE_FILTER},{COLOR_GRADE_FILTER},split[base][glow];"
+        f"[glow]{GLOW_BLUR_FILTER}[blur];"
+        f"[base][blur]{GLOW_BLEND_FILTER}[out]"
+    )
+
+def build_command(input_path, output_path):
+    return [
+        "ffmpeg", "-y", "-i", input_path,
+        "-filter_complex", build_filter_graph(),
+        "-map", "[out]", "-map", "0:a?",
+        "-c:a", "copy",
+        output_path
+    ]
+
 def run_ffmpeg(command, description):
-    """Run an ffmpeg command and handle errors gracefully."""
+    """Run an ffmpeg command and report errors without aborting the caller."""
     print(f"\n[INFO] {description}...")
-    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        print(f"[ERROR] {description} failed: {e}")
+        return False
     if result.returncode != 0:
         print(f"[ERROR] {description} failed:\n{result.stderr.decode()}")
-        sys.exit(1)
+        return False
     print(f"[SUCCESS] {description} complete.")
+    return True
 
-def upscale_video(input_path, output_path):
+def cache_key(input_path):
     """
-    Upscale the video using the lanczos algorithm for best quality.
+    Hash the input contents together with the full ffmpeg invocation.
     """
-    command = [
-        "ffmpeg", "-y", "-i", input_path,
-        "-vf", "scale=iw*2:ih*2:flags=lanczos",
-        "-c:a", "copy",
-        output_path
-    ]
-    run_ffmpeg(command, "Upscaling video")
+    digest = hashlib.sha256()
+    with open(input_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    digest.update(" ".join(build_command("<in>", "<out>")).encode())
+    return digest.hexdigest()
+
+def load_cache(output_dir):
+    try:
+        with open(os.path.join(output_dir, CACHE_FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_cache(output_dir, cache):
+    with open(os.path.join(output_dir, CACHE_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
 
-def color_grade_video(input_path, output_path):
+def enhance_video(input_path, output_path):
     """
-    Apply color grading: increase contrast, saturation, and brightness for a vibrant look.
+    Upscale, color grade and add glow in one decode/encode pass.
     """
-    command = [
-        "ffmpeg", "-y", "-i", input_path,
-        "-vf", "eq=contrast=1.25:saturation=1.6:brightness=0.07",
-        "-c:a", "copy",
-        output_path
-    ]
-    run_ffmpeg(command, "Applying color grading")
+    name = os.path.basename(input_path)
+    return run_ffmpeg(build_command(input_path, output_path), f"Enhancing {name}")
 
-def add_glow_effect(input_path, output_path):
+def process_asset(input_path, output_path, cached_key=None, force=False):
     """
-    Add a soft glow effect for emphasis and a premium feel.
+    Pool worker: hash the input and enhance it unless the cached output is current.
+    Returns (status, key) where status is "enhanced", "skipped" or "failed".
     """
-    command = [
-        "ffmpeg", "-y", "-i", input_path,
-        "-filter_complex", "[0:v]boxblur=15:1[blur];[0:v][blur]blend=all_mode='lighten':opacity=0.5",
-        "-c:a", "copy",
-        output_path
-    ]
-    run_ffmpeg(command, "Adding glow effect")
+    key = cache_key(input_path)
+    if not force and cached_key == key and os.path.exists(output_path):
+        print(f"[SKIP] {os.path.basename(input_path)} is up to date.")
+        return "skipped", key
+    return ("enhanced" if enhance_video(input_path, output_path) else "failed"), key
+
+def enhance_batch(input_dir, output_dir, workers=None, force=False):
+    """
+    Enhance every video in input_dir across a process pool, skipping up-to-date outputs.
+    Returns (processed, skipped, failed) counts.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cache = load_cache(output_dir)
+
+    jobs = []
+    for name in sorted(os.listdir(input_dir)):
+        if not name.lower().endswith(VIDEO_EXTENSIONS):
+            continue
+        stem, ext = os.path.splitext(name)
+        jobs.append((name, os.path.join(input_dir, name), os.path.join(output_dir, f"{stem}-enhanced{ext}")))
+
+    counts = {"enhanced": 0, "skipped": 0, "failed": 0}
+    if not jobs:
+        return 0, 0, 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(process_asset, input_path, output_path, cache.get(name), force): name
+                       for name, input_path, output_path in jobs}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    status, key = future.result()
+                except Exception as e:
+                    # Unreadable input or a crashed worker fails this asset only
+                    print(f"[ERROR] {name} failed: {e}")
+                    status, key = "failed", None
+                if status == "failed":
+                    cache.pop(name, None)
+                else:
+                    cache[name] = key
+                counts[status] += 1
+    finally:
+        # Record finished outputs even if the batch is interrupted
+        save_cache(output_dir, cache)
+
+    return counts["enhanced"], counts["skipped"], counts["failed"]
 
 def main():
+    parser = argparse.ArgumentParser(description="Enhance ScoutVision logo and brand videos")
+    parser.add_argument("--batch", metavar="DIR", help="enhance every video in DIR")
+    parser.add_argument("-o", "--output-dir", help="output directory for batch mode (default: DIR/enhanced)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for batch mode")
+    parser.add_argument("--force", action="store_true", help="re-encode even if outputs are up to date")
+    args = parser.parse_args()
+
     print("=== ScoutVision Logo Enhancement ===")
-    upscale_video(INPUT_PATH, UPSCALED_PATH)
-    color_grade_video(UPSCALED_PATH, GRADED_PATH)
-    add_glow_effect(GRADED_PATH, ENHANCED_PATH)
+    if args.batch:
+        output_dir = args.output_dir or os.path.join(args.batch, "enhanced")
+        processed, skipped, failed = enhance_batch(args.batch, output_dir, args.workers, args.force)
+        print(f"\n[COMPLETE] {processed} enhanced, {skipped} up to date, {failed} failed -> {output_dir}")
+        if failed:
+            sys.exit(1)
+        return
+
+    if not enhance_video(INPUT_PATH, ENHANCED_PATH):
+        sys.exit(1)
     print(f"\n[COMPLETE] Enhanced logo video saved to: {ENHANCED_PATH}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -9,8 +9,9 @@ Author: ScoutVision Team
 Version: 2.0.0
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Header, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import uvicorn
@@ -25,6 +26,19 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 import joblib
 import os
+import asyncio
+import hashlib
+import threading
+
+from live_analysis import LiveAnalysisManager
+from execution_plan import ExecutionPlan, compile_execution_plan
+from landmark_store import LandmarkStore, LandmarkWriter
+from similarity_index import FEATURE_DEFAULTS, PlayerSimilarityIndex
+from percentile_sketches import CohortPercentiles
+from serialization import negotiate
+from market_projection import MarketValueProjector
+from profiling import ProfileStore, ProfilingMiddleware, RequestProfiler, run_in_thread
+from analysis_proxy import AnalysisProxyStore, probe_video
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -46,6 +60,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling; disabled unless SCOUTVISION_PROFILING_TOKEN is set
+request_profiler = RequestProfiler(
+    ProfileStore(os.environ.get("SCOUTVISION_PROFILE_DIR", "profiles"),
+                 max_profiles=int(os.environ.get("SCOUTVISION_PROFILE_RETENTION", "50"))),
+    token=os.environ.get("SCOUTVISION_PROFILING_TOKEN")
+)
+app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
+
+# Percentile cut-offs that replace fixed score thresholds once a cohort has enough data
+HIGH_PERCENTILE = 80.0
+LOW_PERCENTILE = 20.0
+
+def above_cohort(value: float, threshold: float, percentile: Optional[float] = None) -> bool:
+    """Top of the cohort when a percentile is known, otherwise the fixed threshold"""
+    if percentile is not None:
+        return percentile >= HIGH_PERCENTILE
+    return value >= threshold
+
+def below_cohort(value: float, threshold: float, percentile: Optional[float] = None) -> bool:
+    """Bottom of the cohort when a percentile is known, otherwise the fixed threshold"""
+    if percentile is not None:
+        return percentile < LOW_PERCENTILE
+    return value < threshold
+
 # Initialize MediaPipe
 mp_pose = mp.solutions.pose
 mp_face = mp.solutions.face_detection
@@ -56,6 +94,8 @@ class VideoAnalysisRequest(BaseModel):
     video_url: str
     player_id: int
     analysis_type: str = "comprehensive"
+    position: Optional[str] = None
+    league: Optional[str] = None
 
 class VideoAnalysisResponse(BaseModel):
     player_id: int
@@ -68,6 +108,8 @@ class VideoAnalysisResponse(BaseModel):
     areas_for_improvement: List[str]
     motion_data: Dict[str, Any]
     timestamps: List[Dict[str, Any]]
+    percentiles: Dict[str, float] = {}
+    metadata: Dict[str, Any] = {}
 
 class TalentPredictionRequest(BaseModel):
     player_id: int
@@ -76,6 +118,7 @@ class TalentPredictionRequest(BaseModel):
     mindset_scores: Dict[str, float]
     age: int
     position: str
+    league: Optional[str] = None
 
 class TalentPredictionResponse(BaseModel):
     player_id: int
@@ -86,51 +129,150 @@ class TalentPredictionResponse(BaseModel):
     career_longevity_score: float
     leadership_potential: float
     market_value_predictions: Dict[str, float]
+    market_value_projection: Dict[str, Dict[str, float]] = {}
     confidence: str
     key_factors: List[str]
     risk_factors: List[str]
+    percentiles: Dict[str, float] = {}
+
+class PlayerIndexRequest(BaseModel):
+    player_id: int
+    position: str
+    league: Optional[str] = None
+    features: Dict[str, float]
+
+class PlayerBulkIndexRequest(BaseModel):
+    players: List[PlayerIndexRequest]
+
+class PlayerComparisonRequest(BaseModel):
+    player_ids: List[int]
+    k: int = 5
+
+class MarketProjectionPlayer(BaseModel):
+    player_id: int
+    current_value: float
+    age: float
+    peak_age: float = 26.0
+    volatility: Optional[float] = None
+
+class MarketProjectionRequest(BaseModel):
+    players: List[MarketProjectionPlayer]
+    seed: Optional[int] = None
+
+# Largest batch /project-market-value simulates in one request
+MAX_PROJECTION_PLAYERS = 2000
+
+class LiveAnalysisRequest(BaseModel):
+    stream_url: str
+    sport: str = "Football"
+    window_seconds: float = 5.0
+    follow: bool = False
+    realtime: bool = True
+
+class ProfileWindowRequest(BaseModel):
+    seconds: float = 30.0
+
+def landmarks_to_array(landmarks) -> np.ndarray:
+    """Convert MediaPipe pose landmarks into a (33, 4) x/y/z/visibility array"""
+    return np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in landmarks], dtype=np.float32)
 
 class MotionTrackingData:
-    def __init__(self):
+    def __init__(self, plan: Optional[ExecutionPlan] = None, proxies: Optional[AnalysisProxyStore] = None):
+        self.plan = plan or compile_execution_plan("comprehensive")
+        self.proxies = proxies
+        
+        # Only load the models the plan needs; unused stages cost nothing per frame
         self.pose = mp_pose.Pose(
             static_image_mode=False,
-            model_complexity=2,
-            enable_segmentation=True,
+            model_complexity=self.plan.pose_complexity,
             min_detection_confidence=0.5
-        )
+        ) if self.plan.runs("pose") else None
         
-    def analyze_movement(self, video_path: str) -> Dict[str, Any]:
-        """Analyze player movement patterns from video"""
+    def analyze_movement(self, video_path: str, recorder: Optional[LandmarkWriter] = None) -> Dict[str, Any]:
+        """Analyze player movement patterns from video, optionally persisting per-frame landmarks"""
         try:
-            cap = cv2.VideoCapture(video_path)
+            # Decode the upload's low-resolution proxy when it covers the plan
+            proxy = self.proxies.select(video_path, self.plan.max_height, self.plan.fps) if self.proxies else None
+            cap = cv2.VideoCapture(proxy["path"] if proxy else video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            # Frame indices are always reported in the original video's frame rate
+            source_fps = proxy["source"]["fps"] if proxy else fps
+            stride = self.plan.frame_stride(fps)
             movements = []
             frame_count = 0
             
             while cap.isOpened():
+                if frame_count % stride:
+                    # Skipped by the plan's sampling rate: advance without decoding pixels
+                    if not cap.grab():
+                        break
+                    frame_count += 1
+                    continue
+                
                 ret, frame = cap.read()
                 if not ret:
                     break
                     
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = self.pose.process(frame_rgb)
-                
-                if results.pose_landmarks:
-                    # Extract key movement data
-                    landmarks = results.pose_landmarks.landmark
-                    movement_data = self._extract_movement_metrics(landmarks, frame_count)
+                landmarks = self._detect_landmarks(frame)
+                if landmarks is not None:
+                    timestamp = frame_count / fps
+                    source_frame = int(round(timestamp * source_fps)) if proxy else frame_count
+                    movement_data = self._extract_movement_metrics(landmarks, source_frame)
                     movements.append(movement_data)
+                    if recorder is not None:
+                        recorder.append(source_frame, timestamp, landmarks_to_array(landmarks), movement_data)
                 
                 frame_count += 1
             
             cap.release()
+            if recorder is not None:
+                recorder.close(fps=source_fps, source=video_path,
+                               decoded_from={"path": proxy["path"], "fps": fps} if proxy else None)
             
             # Analyze movement patterns
-            return self._analyze_movement_patterns(movements)
+            patterns = self.analyze_movement_patterns(movements)
+            patterns['decoded_from'] = 'proxy' if proxy else 'original'
+            return patterns
             
         except Exception as e:
             logger.error(f"Error in movement analysis: {str(e)}")
             return {}
     
+    def reset(self):
+        """Clear per-stream tracking state so the loaded graphs can analyze another video"""
+        if self.pose is not None and hasattr(self.pose, "reset"):
+            self.pose.reset()
+    
+    def close(self):
+        """Release the MediaPipe graphs held by this tracker"""
+        if self.pose is not None:
+            self.pose.close()
+        self.pose = None
+    
+    def extract_frame_metrics(self, frame, frame_count) -> Optional[Dict[str, float]]:
+        """Run pose estimation on a single BGR frame and extract movement metrics"""
+        landmarks = self._detect_landmarks(frame)
+        if landmarks is None:
+            return None
+        return self._extract_movement_metrics(landmarks, frame_count)
+    
+    def _detect_landmarks(self, frame):
+        """Run the planned pose model on a BGR frame and return its landmarks, if any"""
+        if self.pose is None:
+            return None
+        
+        height, width = frame.shape[:2]
+        if height > self.plan.max_height:
+            scale = self.plan.max_height / height
+            frame = cv2.resize(frame, (int(width * scale), self.plan.max_height), interpolation=cv2.INTER_AREA)
+        
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = self.pose.process(frame_rgb)
+        
+        if not results.pose_landmarks:
+            return None
+        return results.pose_landmarks.landmark
+    
     def _extract_movement_metrics(self, landmarks, frame_count) -> Dict[str, float]:
         """Extract movement metrics from pose landmarks"""
         # Calculate speed, agility, balance metrics
@@ -152,7 +294,7 @@ class MotionTrackingData:
             'stability': 1.0 - abs(center_x - 0.5)  # Distance from center
         }
     
-    def _analyze_movement_patterns(self, movements: List[Dict]) -> Dict[str, Any]:
+    def analyze_movement_patterns(self, movements: List[Dict]) -> Dict[str, Any]:
         """Analyze overall movement patterns"""
         if not movements:
             return {}
@@ -187,6 +329,7 @@ class TalentPredictor:
     def __init__(self):
         self.scaler = StandardScaler()
         self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+        self.market_projector = MarketValueProjector()
         self._load_or_train_model()
     
     def _load_or_train_model(self):
@@ -234,20 +377,14 @@ class TalentPredictor:
         X_scaled = self.scaler.fit_transform(X)
         self.model.fit(X_scaled, y)
     
-    def predict_talent(self, features: Dict[str, float]) -> TalentPredictionResponse:
-        """Predict talent potential based on input features"""
+    def predict_talent(self, features: Dict[str, float],
+                       percentiles: Optional[Dict[str, float]] = None) -> TalentPredictionResponse:
+        """Predict talent potential based on input features and their cohort percentiles"""
+        percentiles = percentiles or {}
         try:
             # Prepare feature vector
             feature_vector = np.array([[
-                features.get('age', 20),
-                features.get('technical_score', 5),
-                features.get('physical_score', 5),
-                features.get('tactical_score', 5),
-                features.get('mental_score', 5),
-                features.get('speed', 50),
-                features.get('agility', 50),
-                features.get('stability', 50),
-                features.get('experience_years', 2)
+                features.get(name, default) for name, default in FEATURE_DEFAULTS.items()
             ]])
             
             # Scale and predict
@@ -263,11 +400,15 @@ class TalentPredictor:
             career_longevity = min(20, max(5, features.get('mental_score', 5) * 2))
             leadership_potential = features.get('mental_score', 5) * 10
             
-            # Market value predictions (in millions)
+            # Market value predictions (in millions): Monte Carlo quantiles, seeded per player
             current_value = base_score * 50
-            value_1year = current_value * (1 + np.random.uniform(0.1, 0.3))
-            value_3years = current_value * (1 + np.random.uniform(0.3, 0.8))
-            value_5years = current_value * (1 + np.random.uniform(0.2, 1.2))
+            market_projection = self.market_projector.project_one(
+                current_value,
+                age=features.get('age', 20),
+                peak_age=peak_age,
+                volatility=self.market_projector.base_volatility + injury_risk / 1000,
+                seed=[self.market_projector.seed, int(features.get('player_id', 0))]
+            )
             
             # Determine confidence level
             confidence_score = min(features.get('technical_score', 5), 
@@ -287,16 +428,16 @@ class TalentPredictor:
             key_factors = []
             risk_factors = []
             
-            if features.get('technical_score', 5) >= 7:
+            if above_cohort(features.get('technical_score', 5), 7, percentiles.get('technical_score')):
                 key_factors.append("Exceptional technical skills")
-            if features.get('physical_score', 5) >= 7:
+            if above_cohort(features.get('physical_score', 5), 7, percentiles.get('physical_score')):
                 key_factors.append("Superior physical attributes")
-            if features.get('mental_score', 5) >= 7:
+            if above_cohort(features.get('mental_score', 5), 7, percentiles.get('mindset_score')):
                 key_factors.append("Strong mental resilience")
             
             if features.get('age', 20) > 25:
                 risk_factors.append("Age may limit long-term potential")
-            if features.get('physical_score', 5) < 5:
+            if below_cohort(features.get('physical_score', 5), 5, percentiles.get('physical_score')):
                 risk_factors.append("Physical development needs attention")
             if injury_risk > 60:
                 risk_factors.append("Higher injury risk profile")
@@ -311,13 +452,13 @@ class TalentPredictor:
                 leadership_potential=round(leadership_potential, 2),
                 market_value_predictions={
                     "current": round(current_value, 2),
-                    "1_year": round(value_1year, 2),
-                    "3_years": round(value_3years, 2),
-                    "5_years": round(value_5years, 2)
+                    **{horizon: bands["p50"] for horizon, bands in market_projection.items()}
                 },
+                market_value_projection=market_projection,
                 confidence=confidence,
                 key_factors=key_factors,
-                risk_factors=risk_factors
+                risk_factors=risk_factors,
+                percentiles=percentiles
             )
             
         except Exception as e:
@@ -325,8 +466,51 @@ class TalentPredictor:
             raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 # Initialize AI services
-motion_tracker = MotionTrackingData()
 talent_predictor = TalentPredictor()
+live_manager = LiveAnalysisManager(
+    MotionTrackingData,
+    source_roots=os.environ.get("SCOUTVISION_LIVE_SOURCE_DIRS", "uploads").split(os.pathsep)
+)
+landmark_store = LandmarkStore(os.environ.get("SCOUTVISION_LANDMARK_STORE", "landmark_store"))
+POSE_LANDMARK_NAMES = [landmark.name for landmark in mp_pose.PoseLandmark]
+similarity_index = PlayerSimilarityIndex(
+    talent_predictor.scaler, path=os.environ.get("SCOUTVISION_SIMILARITY_INDEX", "similarity_index")
+)
+cohort_percentiles = CohortPercentiles(os.environ.get("SCOUTVISION_PERCENTILE_SKETCHES", "percentile_sketches.json"))
+analysis_proxies = AnalysisProxyStore(
+    os.environ.get("SCOUTVISION_PROXY_DIR", "proxies"),
+    max_height=int(os.environ.get("SCOUTVISION_PROXY_HEIGHT", "720")),
+    fps=float(os.environ.get("SCOUTVISION_PROXY_FPS", "30"))
+)
+
+_tracker_pool = threading.local()
+
+def tracker_for(plan: ExecutionPlan) -> MotionTrackingData:
+    """This thread's tracker for the plan's model set, so MediaPipe graphs load once per thread"""
+    trackers = getattr(_tracker_pool, "trackers", None)
+    if trackers is None:
+        trackers = _tracker_pool.trackers = {}
+    key = (tuple(plan.stages), plan.pose_complexity)
+    tracker = trackers.get(key)
+    if tracker is None:
+        tracker = trackers[key] = MotionTrackingData(plan, analysis_proxies)
+    else:
+        tracker.reset()
+    # Stride and resolution are read from the plan per call; only the models are shared
+    tracker.plan = plan
+    return tracker
+
+def run_motion_analysis(plan: ExecutionPlan, video_path: str,
+                        recorder: Optional[LandmarkWriter] = None) -> Dict[str, Any]:
+    """Worker-thread entry point for /analyze-video"""
+    return tracker_for(plan).analyze_movement(video_path, recorder)
+
+def video_duration(video_path: str) -> Optional[float]:
+    try:
+        info = probe_video(video_path)
+    except ValueError:
+        return None
+    return info["frames"] / info["fps"] if info["frames"] > 0 else None
 
 @app.get("/")
 async def root():
@@ -337,6 +521,12 @@ async def root():
         "endpoints": [
             "/analyze-video",
             "/predict-talent",
+            "/live-analysis",
+            "/landmarks",
+            "/proxies",
+            "/players",
+            "/percentiles",
+            "/project-market-value",
             "/health"
         ]
     }
@@ -346,11 +536,22 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 @app.post("/analyze-video", response_model=VideoAnalysisResponse)
-async def analyze_video(request: VideoAnalysisRequest):
-    """Analyze video for player performance metrics"""
+async def analyze_video(request: VideoAnalysisRequest, accept: Optional[str] = Header(None)):
+    """Analyze video for player performance metrics.
+    
+    Send `Accept: multipart/mixed` to receive per-frame series as .npy parts
+    instead of JSON arrays under motion_data.series.
+    """
     try:
         logger.info(f"Starting video analysis for player {request.player_id}")
         
+        # Probe local files so the plan can estimate the cost of the whole clip
+        duration = video_duration(request.video_url) if os.path.isfile(request.video_url) else None
+        try:
+            plan = compile_execution_plan(request.analysis_type, duration)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         # In a real implementation, download video from URL
         # For demo, we'll generate simulated analysis results
         
@@ -363,6 +564,20 @@ async def analyze_video(request: VideoAnalysisRequest):
             "distance_covered": np.random.uniform(8000, 12000)
         }
         
+        # Local files (e.g. from /upload-video) run the planned pose stages for real
+        metadata = {"execution_plan": plan.model_dump()}
+        series = {}
+        if os.path.isfile(request.video_url):
+            # Keep per-frame landmarks so clips and re-scores don't need another decode
+            video_id = f"{request.player_id}-{hashlib.sha256(request.video_url.encode()).hexdigest()[:16]}"
+            recorder = landmark_store.writer(video_id, POSE_LANDMARK_NAMES)
+            motion_data["tracking"] = await run_in_thread(run_motion_analysis, plan, request.video_url, recorder)
+            metadata["landmark_video_id"] = video_id
+            if landmark_store.exists(video_id):
+                series = landmark_store.query(
+                    video_id, landmarks=[], components=[], metrics=["center_x", "center_y", "speed"]
+                )
+        
         # Generate analysis scores
         technical_score = np.random.uniform(6, 9)
         physical_score = motion_data["agility_score"] * 1.1
@@ -370,22 +585,33 @@ async def analyze_video(request: VideoAnalysisRequest):
         mental_score = np.random.uniform(6, 9)
         overall_score = (technical_score + physical_score + tactical_score + mental_score) / 4
         
+        # Rank scores against the player's position/league cohort
+        scores = {
+            "overall_score": float(overall_score),
+            "technical_score": float(technical_score),
+            "physical_score": float(physical_score),
+            "tactical_score": float(tactical_score),
+            "mental_score": float(mental_score)
+        }
+        percentiles = cohort_percentiles.percentiles(scores, request.position, request.league)
+        cohort_percentiles.record(scores, request.position, request.league)
+        
         # Generate insights
         key_highlights = []
         areas_for_improvement = []
         
-        if technical_score >= 8:
+        if above_cohort(technical_score, 8, percentiles.get("technical_score")):
             key_highlights.append("Excellent ball control and technique")
-        if physical_score >= 8:
+        if above_cohort(physical_score, 8, percentiles.get("physical_score")):
             key_highlights.append("Superior speed and agility")
-        if tactical_score >= 7:
+        if above_cohort(tactical_score, 7, percentiles.get("tactical_score")):
             key_highlights.append("Good game awareness and positioning")
         
-        if technical_score < 6:
+        if below_cohort(technical_score, 6, percentiles.get("technical_score")):
             areas_for_improvement.append("Technical skills need development")
-        if physical_score < 6:
+        if below_cohort(physical_score, 6, percentiles.get("physical_score")):
             areas_for_improvement.append("Physical conditioning could be improved")
-        if tactical_score < 6:
+        if below_cohort(tactical_score, 6, percentiles.get("tactical_score")):
             areas_for_improvement.append("Tactical understanding needs work")
         
         # Generate timestamps for key events
@@ -396,7 +622,7 @@ async def analyze_video(request: VideoAnalysisRequest):
             {"timestamp": "00:12:18", "event": "Precise passing under pressure", "score": 8.0}
         ]
         
-        return VideoAnalysisResponse(
+        response = VideoAnalysisResponse(
             player_id=request.player_id,
             overall_score=round(overall_score, 2),
             technical_score=round(technical_score, 2),
@@ -406,9 +632,14 @@ async def analyze_video(request: VideoAnalysisRequest):
             key_highlights=key_highlights,
             areas_for_improvement=areas_for_improvement,
             motion_data=motion_data,
-            timestamps=timestamps
+            timestamps=timestamps,
+            percentiles=percentiles,
+            metadata=metadata
         )
+        return negotiate(accept, response.model_dump(), series, ("motion_data", "series"))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing video: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Video analysis failed: {str(e)}")
@@ -433,8 +664,32 @@ async def predict_talent(request: TalentPredictionRequest):
             'experience_years': request.performance_metrics.get('years_experience', 2)
         }
         
+        # Video scores are ranked against the video analysis cohort; the rest are tracked here
+        video_scores = {name: features[name] for name in ('technical_score', 'physical_score', 'tactical_score')}
+        talent_metrics = {
+            'mindset_score': features['mental_score'],
+            'speed': features['speed'],
+            'agility': features['agility'],
+            'stability': features['stability']
+        }
+        percentiles = cohort_percentiles.percentiles(
+            {**video_scores, **talent_metrics}, request.position, request.league
+        )
+        
         # Get prediction from model
-        prediction = talent_predictor.predict_talent(features)
+        prediction = talent_predictor.predict_talent(features, percentiles)
+        
+        overall_percentile = cohort_percentiles.percentile(
+            'overall_potential', prediction.overall_potential, request.position, request.league
+        )
+        if overall_percentile is not None:
+            prediction.percentiles['overall_potential'] = overall_percentile
+        talent_metrics['overall_potential'] = prediction.overall_potential
+        cohort_percentiles.record(talent_metrics, request.position, request.league)
+        
+        # Keep the comparison index current as players are assessed
+        await run_in_thread(similarity_index.upsert, request.player_id, features,
+                            request.position, request.league)
         
         return prediction
         
@@ -444,7 +699,7 @@ async def predict_talent(request: TalentPredictionRequest):
 
 @app.post("/upload-video")
 async def upload_video(file: UploadFile = File(...)):
-    """Upload video file for analysis"""
+    """Upload video file for analysis and queue its low-resolution analysis proxy"""
     try:
         # Save uploaded file
         file_path = f"uploads/{file.filename}"
@@ -454,12 +709,307 @@ async def upload_video(file: UploadFile = File(...)):
             content = await file.read()
             buffer.write(content)
         
-        return {"filename": file.filename, "file_path": file_path, "size": len(content)}
+        content_hash = hashlib.sha256(content).hexdigest()
+        proxy = analysis_proxies.submit(file_path, content_hash)
+        
+        return {
+            "filename": file.filename,
+            "file_path": file_path,
+            "size": len(content),
+            "sha256": content_hash,
+            "proxy": proxy
+        }
         
     except Exception as e:
         logger.error(f"Error uploading video: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Video upload failed: {str(e)}")
 
+@app.get("/proxies/{content_hash}")
+async def get_proxy_status(content_hash: str):
+    """Status of the analysis proxy for an upload's sha256"""
+    try:
+        proxy = analysis_proxies.status(content_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if proxy["status"] is None:
+        raise HTTPException(status_code=404, detail=f"No analysis proxy for: {content_hash}")
+    return proxy
+
+@app.post("/live-analysis/start")
+async def start_live_analysis(request: LiveAnalysisRequest):
+    """Start a rolling-window analysis session over a live frame source"""
+    try:
+        # Loading pose models and opening the source both block
+        session = await run_in_thread(
+            live_manager.start_session,
+            request.stream_url,
+            sport=request.sport,
+            window_seconds=request.window_seconds,
+            follow=request.follow,
+            realtime=request.realtime,
+            loop=asyncio.get_running_loop()
+        )
+        return session.info()
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting live analysis: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Live analysis failed to start: {str(e)}")
+
+@app.get("/live-analysis/{session_id}")
+async def get_live_analysis_result(session_id: str):
+    """Get the latest rolling metrics for a live analysis session"""
+    session = live_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail=f"Live analysis session not found: {session_id}")
+    return session.get_result()
+
+@app.delete("/live-analysis/{session_id}")
+async def stop_live_analysis(session_id: str):
+    """Stop a live analysis session"""
+    session = live_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail=f"Live analysis session not found: {session_id}")
+    await run_in_thread(live_manager.stop_session, session_id)
+    return session.info()
+
+@app.websocket("/ws/live-analysis/{session_id}")
+async def live_analysis_updates(websocket: WebSocket, session_id: str):
+    """Push rolling metrics to the client as each window update is produced"""
+    session = live_manager.get_session(session_id)
+    await websocket.accept()
+    if not session:
+        await websocket.close(code=1008)
+        return
+    
+    queue = session.subscribe()
+    try:
+        while True:
+            result = await queue.get()
+            await websocket.send_json(result)
+            if result.get("status") != "Active":
+                break
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Live analysis WebSocket error: {str(e)}")
+    finally:
+        session.unsubscribe(queue)
+
+@app.get("/landmarks/{video_id}")
+async def get_landmark_metadata(video_id: str):
+    """Describe the stored per-frame landmark columns for an analyzed video"""
+    if not landmark_store.exists(video_id):
+        raise HTTPException(status_code=404, detail=f"No stored landmarks for video: {video_id}")
+    return landmark_store.metadata(video_id)
+
+@app.get("/landmarks/{video_id}/slice")
+async def get_landmark_slice(
+    video_id: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    landmarks: Optional[str] = None,
+    components: Optional[str] = None,
+    metrics: Optional[str] = None,
+    accept: Optional[str] = Header(None)
+):
+    """Return landmarks and per-frame metrics for a time range, e.g. around a highlight.
+    
+    landmarks, components and metrics are comma-separated subsets
+    (e.g. landmarks=LEFT_HIP,RIGHT_HIP&components=x,y&metrics=speed).
+    Send `Accept: multipart/mixed` to receive the columns as .npy parts.
+    """
+    if not landmark_store.exists(video_id):
+        raise HTTPException(status_code=404, detail=f"No stored landmarks for video: {video_id}")
+    
+    def split(value: Optional[str]) -> Optional[List[str]]:
+        return [item.strip() for item in value.split(",") if item.strip()] if value is not None else None
+    
+    try:
+        columns = landmark_store.query(
+            video_id, start=start, end=end,
+            landmarks=split(landmarks), components=split(components), metrics=split(metrics)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    summary = {"video_id": video_id, "frames": int(len(columns["frame"]))}
+    return negotiate(accept, summary, columns, ("columns",))
+
+@app.put("/players/index")
+async def index_player(request: PlayerIndexRequest):
+    """Insert or update a player in the similarity index"""
+    # Index calls run in a thread: an upsert may rebuild a whole partition's KD-tree
+    await run_in_thread(similarity_index.upsert, request.player_id, request.features,
+                        request.position, request.league)
+    return {"player_id": request.player_id, "indexed_players": len(similarity_index)}
+
+@app.post("/players/index/bulk")
+async def bulk_index_players(request: PlayerBulkIndexRequest):
+    """Load many players at once, rebuilding each partition a single time, then persist the index"""
+    players = request.players
+    raw = np.array([similarity_index.raw_vector(player.features) for player in players])
+    
+    def load():
+        similarity_index.bulk_load([player.player_id for player in players], raw,
+                                   [player.position for player in players],
+                                   [player.league for player in players])
+        similarity_index.save()
+    
+    await run_in_thread(load)
+    return {"loaded": len(players), "indexed_players": len(similarity_index)}
+
+@app.delete("/players/index/{player_id}")
+async def remove_indexed_player(player_id: int):
+    """Remove a player from the similarity index"""
+    if not await run_in_thread(similarity_index.remove, player_id):
+        raise HTTPException(status_code=404, detail=f"Player not indexed: {player_id}")
+    return {"player_id": player_id, "indexed_players": len(similarity_index)}
+
+@app.get("/players/{player_id}/similar")
+async def find_similar_players(player_id: int, k: int = 10, position: Optional[str] = None,
+                               league: Optional[str] = None):
+    """Find the k most similar players, optionally within a position and league"""
+    try:
+        neighbours = await run_in_thread(similarity_index.neighbours, player_id, k, position, league)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Player not indexed: {player_id}")
+    return {"player_id": player_id, "neighbours": neighbours}
+
+def compare_indexed_players(player_ids: List[int], k: int) -> Dict[str, Any]:
+    missing = [player_id for player_id in player_ids if player_id not in similarity_index]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Players not indexed: {missing}")
+    
+    vectors = np.array([similarity_index.vector(player_id) for player_id in player_ids])
+    distances = np.sqrt(((vectors[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2))
+    return {
+        "player_ids": player_ids,
+        "distances": np.round(distances, 4).tolist(),
+        "similar_players": {
+            str(player_id): similarity_index.neighbours(player_id, k=k)
+            for player_id in player_ids
+        }
+    }
+
+@app.post("/players/compare")
+async def compare_players(request: PlayerComparisonRequest):
+    """Pairwise standardized distances between players plus each player's nearest peers"""
+    return await run_in_thread(compare_indexed_players, request.player_ids, request.k)
+
+def benchmark_indexed_player(player_id: int, position: Optional[str], league: Optional[str],
+                             k: int) -> Dict[str, Any]:
+    if player_id not in similarity_index:
+        raise HTTPException(status_code=404, detail=f"Player not indexed: {player_id}")
+    
+    own_position, own_league = similarity_index.location(player_id)
+    position = position or own_position
+    league = league or own_league
+    peers = similarity_index.neighbours(player_id, k=k, position=position, league=league)
+    if not peers:
+        raise HTTPException(status_code=404, detail="No peers indexed for this position and league")
+    
+    player_vector = similarity_index.vector(player_id)
+    peer_mean = np.mean([similarity_index.vector(peer["player_id"]) for peer in peers], axis=0)
+    return {
+        "player_id": player_id,
+        "position": position,
+        "league": league,
+        "peer_count": len(peers),
+        "feature_deltas": {
+            name: round(float(delta), 3)
+            for name, delta in zip(FEATURE_DEFAULTS, player_vector - peer_mean)
+        },
+        "peers": peers
+    }
+
+@app.get("/players/{player_id}/benchmark")
+async def benchmark_player(player_id: int, position: Optional[str] = None, league: Optional[str] = None,
+                           k: int = 50):
+    """Compare a player's standardized features with their nearest peers in a position and league"""
+    return await run_in_thread(benchmark_indexed_player, player_id, position, league, k)
+
+@app.post("/project-market-value")
+async def project_market_value(request: MarketProjectionRequest):
+    """Monte Carlo p10/p50/p90 market values for a batch of players in one vectorized run"""
+    projector = talent_predictor.market_projector
+    players = request.players
+    if not players:
+        return {"projections": {}}
+    if len(players) > MAX_PROJECTION_PLAYERS:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {MAX_PROJECTION_PLAYERS} players per projection request")
+    
+    # Seeded per player like /predict-talent, so bands do not depend on the rest of the batch
+    seed = projector.seed if request.seed is None else request.seed
+    quantiles = await run_in_thread(
+        projector.project,
+        [player.current_value for player in players],
+        [player.age for player in players],
+        [player.peak_age for player in players],
+        [projector.base_volatility if player.volatility is None else player.volatility for player in players],
+        player_seeds=[[seed, player.player_id] for player in players]
+    )
+    return {
+        "paths": projector.n_paths,
+        "projections": {
+            str(player.player_id): projector.to_dict(player_quantiles)
+            for player, player_quantiles in zip(players, quantiles)
+        }
+    }
+
+@app.get("/percentiles/{metric}")
+async def get_cohort_distribution(metric: str, position: Optional[str] = None, league: Optional[str] = None,
+                                  value: Optional[float] = None):
+    """Cohort quantiles for a metric, plus the percentile of an optional value"""
+    quantiles = cohort_percentiles.quantiles(metric, (0.1, 0.25, 0.5, 0.75, 0.9), position, league)
+    if quantiles is None:
+        raise HTTPException(status_code=404, detail=f"Not enough data for metric: {metric}")
+    result = {"metric": metric, "position": position, "league": league, "quantiles": quantiles}
+    if value is not None:
+        result["percentile"] = cohort_percentiles.percentile(metric, value, position, league)
+    return result
+
+def require_profiling_token(token: Optional[str]):
+    if not request_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not request_profiler.authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+@app.get("/admin/profiles")
+async def list_profiles(x_scoutvision_profile_token: Optional[str] = Header(None)):
+    """Saved profiles, newest first, plus the current time window if one was started"""
+    require_profiling_token(x_scoutvision_profile_token)
+    return {"profiles": request_profiler.store.list(), "window": request_profiler.window}
+
+@app.get("/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str, x_scoutvision_profile_token: Optional[str] = Header(None)):
+    """Download a .pstats or .speedscope.json profile"""
+    require_profiling_token(x_scoutvision_profile_token)
+    path = request_profiler.store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    media_type = "application/json" if path.endswith(".json") else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+@app.post("/admin/profiles/window")
+async def start_profile_window(request: ProfileWindowRequest,
+                               x_scoutvision_profile_token: Optional[str] = Header(None)):
+    """Sample every thread of the service for a time window"""
+    require_profiling_token(x_scoutvision_profile_token)
+    try:
+        return request_profiler.start_window(request.seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.on_event("shutdown")
+async def shutdown_services():
+    live_manager.stop_all()
+    cohort_percentiles.save()
+    similarity_index.save()
+    analysis_proxies.shutdown()
+
 if __name__ == "__main__":
     uvicorn.run(
         "ai_service:app",
@@ -0,0 +1,276 @@
+"""
+ScoutVision Analysis Proxies
+
+Uploaded videos are often 1080p or 4K at a high bitrate, but pose analysis
+never looks at more than the execution plan's resolution and frame rate. Each
+upload is transcoded in the background into a low-resolution proxy, keyed by
+the sha256 of its content. Later analyses decode the proxy instead of the
+original when it covers the plan's resolution and frame rate. Re-uploading
+the same content reuses the existing proxy. Builds run later than the upload,
+so a build only reads a file that still has the queued content hash, and
+re-checks it before the proxy is published.
+
+The transcode uses ffmpeg when it is on PATH and falls back to OpenCV.
+
+Author: ScoutVision Team
+Version: 2.0.0
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+NOT_NEEDED = "not_needed"
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def probe_video(path: str) -> Dict[str, float]:
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {path}")
+        return {
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": cap.get(cv2.CAP_PROP_FPS) or 30.0,
+            "frames": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        }
+    finally:
+        cap.release()
+
+
+def proxy_geometry(width: int, height: int, max_height: int) -> Dict[str, int]:
+    """Output size that fits max_height, keeps the aspect ratio and has even dimensions"""
+    if height <= max_height:
+        return {"width": width - width % 2, "height": height - height % 2}
+    scale = max_height / height
+    target_width = int(round(width * scale))
+    return {"width": target_width - target_width % 2, "height": max_height - max_height % 2}
+
+
+class AnalysisProxyStore:
+    """Background proxy transcoder with a content-hash keyed cache on disk"""
+
+    def __init__(self, directory: str, max_height: int = 720, fps: float = 30.0, workers: int = 1,
+                 use_ffmpeg: bool = True):
+        self.directory = directory
+        self.max_height = max_height
+        self.fps = fps
+        self.ffmpeg = shutil.which("ffmpeg") if use_ffmpeg else None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-proxy")
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Any] = {}
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._load_sources()
+
+    # Sources: which local file has which content hash
+
+    def _sources_path(self) -> str:
+        return os.path.join(self.directory, "sources.json")
+
+    def _load_sources(self):
+        try:
+            with open(self._sources_path(), "r", encoding="utf-8") as f:
+                self._sources = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to load proxy source index: {str(e)}")
+
+    def _save_sources(self):
+        tmp_path = f"{self._sources_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._sources, f)
+        os.replace(tmp_path, self._sources_path())
+
+    def register(self, video_path: str, sha256: str):
+        """Remember the content hash of a local file, valid while its size and mtime are unchanged"""
+        stat = os.stat(video_path)
+        with self._lock:
+            self._sources[os.path.realpath(video_path)] = {
+                "sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns
+            }
+            self._save_sources()
+
+    def content_hash(self, video_path: str) -> Optional[str]:
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            return None
+        with self._lock:
+            source = self._sources.get(os.path.realpath(video_path))
+        if source is None or source["size"] != stat.st_size or source["mtime_ns"] != stat.st_mtime_ns:
+            return None
+        return source["sha256"]
+
+    def _verified_source(self, sha256: str, preferred: str) -> Optional[str]:
+        """A local file that still has the given content, preferring the one that was uploaded"""
+        with self._lock:
+            candidates = [preferred] + [path for path, source in self._sources.items()
+                                        if source["sha256"] == sha256]
+        for path in candidates:
+            if self.content_hash(path) == sha256:
+                return path
+        return None
+
+    # Proxies
+
+    def proxy_path(self, sha256: str) -> str:
+        return os.path.join(self.directory, f"{sha256}.mp4")
+
+    def _metadata_path(self, sha256: str) -> str:
+        return os.path.join(self.directory, f"{sha256}.json")
+
+    def status(self, sha256: str) -> Dict[str, Any]:
+        if not SHA256_PATTERN.match(sha256):
+            raise ValueError(f"Invalid content hash: {sha256}")
+        with self._lock:
+            if sha256 in self._pending:
+                return {"sha256": sha256, "status": PENDING}
+        try:
+            with open(self._metadata_path(sha256), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"sha256": sha256, "status": None}
+
+    def submit(self, video_path: str, sha256: str) -> Dict[str, Any]:
+        """Register an upload and queue its proxy transcode unless one exists or is running"""
+        self.register(video_path, sha256)
+        current = self.status(sha256)
+        if current["status"] in (READY, PENDING, NOT_NEEDED):
+            return current
+        with self._lock:
+            if sha256 in self._pending:
+                return {"sha256": sha256, "status": PENDING}
+            self._pending[sha256] = self._executor.submit(self._build, video_path, sha256)
+        return {"sha256": sha256, "status": PENDING}
+
+    def wait(self, sha256: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        with self._lock:
+            future = self._pending.get(sha256)
+        if future is not None:
+            future.result(timeout)
+        return self.status(sha256)
+
+    def select(self, video_path: str, max_height: int, fps: float) -> Optional[Dict[str, Any]]:
+        """
+        Metadata of the proxy to decode instead of video_path (path, fps and the
+        source's fps), if it covers the requested resolution and frame rate.
+        """
+        sha256 = self.content_hash(video_path)
+        if sha256 is None:
+            return None
+        proxy = self.status(sha256)
+        if proxy["status"] != READY or not os.path.exists(self.proxy_path(sha256)):
+            return None
+        source = proxy["source"]
+        if proxy["height"] < min(max_height, source["height"]) - 1:
+            return None
+        if proxy["fps"] < min(fps, source["fps"]) - 0.01:
+            return None
+        return {**proxy, "path": self.proxy_path(sha256)}
+
+    def _build(self, video_path: str, sha256: str):
+        metadata: Dict[str, Any] = {"sha256": sha256}
+        tmp_path = os.path.join(self.directory, f"{sha256}.tmp.mp4")
+        try:
+            # The upload may have been overwritten by another file since it was queued
+            source_path = self._verified_source(sha256, video_path)
+            if source_path is None:
+                raise ValueError("no local file has this content anymore")
+            source = probe_video(source_path)
+            metadata["source"] = source
+            fps = min(self.fps, source["fps"])
+            if source["height"] <= self.max_height and source["fps"] <= self.fps + 0.01:
+                # Already as cheap to decode as a proxy would be
+                metadata["status"] = NOT_NEEDED
+                return
+
+            geometry = proxy_geometry(source["width"], source["height"], self.max_height)
+            if self.ffmpeg:
+                self._transcode_ffmpeg(source_path, tmp_path, geometry, fps)
+            else:
+                self._transcode_opencv(source_path, tmp_path, geometry, source["fps"], fps)
+            if self.content_hash(source_path) != sha256:
+                raise ValueError(f"{source_path} changed while its proxy was built")
+            os.replace(tmp_path, self.proxy_path(sha256))
+
+            metadata.update({
+                "status": READY,
+                "path": self.proxy_path(sha256),
+                "width": geometry["width"],
+                "height": geometry["height"],
+                "fps": fps,
+                "size": os.path.getsize(self.proxy_path(sha256)),
+                "encoder": "ffmpeg" if self.ffmpeg else "opencv",
+            })
+            logger.info(f"Built {geometry['height']}p analysis proxy for {video_path}")
+        except Exception as e:
+            logger.error(f"Failed to build analysis proxy for {video_path}: {str(e)}")
+            metadata.update({"status": FAILED, "error": str(e)})
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            with open(self._metadata_path(sha256), "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+            with self._lock:
+                self._pending.pop(sha256, None)
+
+    def _transcode_ffmpeg(self, video_path: str, output_path: str, geometry: Dict[str, int], fps: float):
+        command = [
+            self.ffmpeg, "-y", "-loglevel", "error", "-i", video_path,
+            "-vf", f"scale={geometry['width']}:{geometry['height']},fps={fps:g}",
+            "-an", "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+            # Short GOPs keep frame-skipping (grab) cheap for strided plans
+            "-g", str(max(1, int(round(fps)))), "-pix_fmt", "yuv420p",
+            output_path,
+        ]
+        subprocess.run(command, check=True, capture_output=True)
+
+    def _transcode_opencv(self, video_path: str, output_path: str, geometry: Dict[str, int],
+                          source_fps: float, fps: float):
+        cap = cv2.VideoCapture(video_path)
+        size = (geometry["width"], geometry["height"])
+        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+        try:
+            if not writer.isOpened():
+                raise RuntimeError("OpenCV video writer could not be opened")
+            # Keep the source frames closest to the proxy's frame times
+            step = source_fps / fps
+            next_frame = 0.0
+            index = 0
+            while True:
+                if index < int(round(next_frame)):
+                    if not cap.grab():
+                        break
+                    index += 1
+                    continue
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if frame.shape[1::-1] != size:
+                    frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                writer.write(frame)
+                index += 1
+                next_frame += step
+        finally:
+            cap.release()
+            writer.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
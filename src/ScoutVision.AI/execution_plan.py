@@ -0,0 +1,122 @@
+"""
+ScoutVision Analysis Execution Plans
+
+Compiles a requested analysis type into an execution plan: which vision models
+run, at what sampled frame rate and at what resolution. Only the stages
+required by the metrics of the analysis type are enabled, and the plan carries
+a relative cost estimate so callers can see what a request will spend.
+
+Author: ScoutVision Team
+Version: 2.0.0
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+# Relative per-frame cost of each stage at the reference resolution
+STAGE_COSTS = {
+    "pose": {0: 1.0, 1: 2.0, 2: 5.0},   # keyed by MediaPipe model_complexity
+}
+SEGMENTATION_COST = 1.5
+REFERENCE_HEIGHT = 720
+
+# Stages each metric depends on
+METRIC_STAGES = {
+    "speed": ["pose"],
+    "agility": ["pose"],
+    "balance": ["pose"],
+    "stability": ["pose"],
+    "body_lean": ["pose"],
+    "shoulder_width": ["pose"],
+}
+
+# Metrics, sampling rate, resolution and pose complexity per analysis type
+ANALYSIS_PROFILES = {
+    "comprehensive": {
+        "metrics": ["speed", "agility", "balance", "stability", "body_lean", "shoulder_width"],
+        "fps": 25.0, "max_height": 720, "pose_complexity": 2,
+    },
+    "physical": {
+        "metrics": ["speed", "agility", "balance", "stability"],
+        "fps": 30.0, "max_height": 720, "pose_complexity": 1,
+    },
+    "technical": {
+        "metrics": ["balance", "stability", "body_lean", "shoulder_width"],
+        "fps": 15.0, "max_height": 1080, "pose_complexity": 2,
+    },
+    "tactical": {
+        "metrics": ["speed", "stability"],
+        "fps": 10.0, "max_height": 540, "pose_complexity": 1,
+    },
+    "quick": {
+        "metrics": ["speed", "balance"],
+        "fps": 10.0, "max_height": 480, "pose_complexity": 0,
+    },
+}
+
+# What the tracker ran for every request before plans existed: heaviest pose
+# model plus segmentation on every frame of a 30 fps 1080p source
+BASELINE_COST_PER_SECOND = (STAGE_COSTS["pose"][2] + SEGMENTATION_COST) * (1080 / REFERENCE_HEIGHT) ** 2 * 30
+
+
+class ExecutionPlan(BaseModel):
+    analysis_type: str
+    metrics: List[str]
+    stages: List[str]
+    skipped_stages: List[str]
+    fps: float
+    max_height: int
+    pose_complexity: int
+    cost_per_frame: float
+    cost_per_second: float
+    relative_cost: float
+    estimated_cost: Optional[float] = None
+
+    def runs(self, stage: str) -> bool:
+        return stage in self.stages
+
+    def frame_stride(self, source_fps: float) -> int:
+        """Number of source frames per analyzed frame"""
+        if not source_fps or source_fps <= self.fps:
+            return 1
+        return max(1, int(round(source_fps / self.fps)))
+
+
+def compile_execution_plan(analysis_type: str, duration_seconds: Optional[float] = None) -> ExecutionPlan:
+    """Compile an analysis type into the minimal set of stages its metrics need"""
+    profile = ANALYSIS_PROFILES.get(analysis_type.lower())
+    if profile is None:
+        raise ValueError(
+            f"Unknown analysis type '{analysis_type}'. "
+            f"Expected one of: {', '.join(sorted(ANALYSIS_PROFILES))}"
+        )
+
+    stages: List[str] = []
+    for metric in profile["metrics"]:
+        for stage in METRIC_STAGES[metric]:
+            if stage not in stages:
+                stages.append(stage)
+
+    scale = (profile["max_height"] / REFERENCE_HEIGHT) ** 2
+    cost_per_frame = 0.0
+    for stage in stages:
+        cost = STAGE_COSTS[stage]
+        if stage == "pose":
+            cost = cost[profile["pose_complexity"]]
+        cost_per_frame += cost * scale
+    cost_per_second = cost_per_frame * profile["fps"]
+
+    return ExecutionPlan(
+        analysis_type=analysis_type.lower(),
+        metrics=list(profile["metrics"]),
+        stages=stages,
+        skipped_stages=[stage for stage in STAGE_COSTS if stage not in stages],
+        fps=profile["fps"],
+        max_height=profile["max_height"],
+        pose_complexity=profile["pose_complexity"],
+        cost_per_frame=round(cost_per_frame, 3),
+        cost_per_second=round(cost_per_second, 3),
+        relative_cost=round(cost_per_second / BASELINE_COST_PER_SECOND, 4),
+        estimated_cost=round(cost_per_second * duration_seconds, 2) if duration_seconds else None,
+    )
@@ -0,0 +1,248 @@
+"""
+ScoutVision Landmark Store
+
+Persistent columnar store of per-frame pose landmarks and derived movement
+metrics. Each analyzed video gets a directory of NumPy column files that are
+memory-mapped on read, so time-range and landmark-subset queries only touch
+the pages they need instead of loading (or re-decoding) the whole video.
+
+Layout of <root>/<video_id>/:
+    meta.json                   frame count, fps, landmark names, columns
+    frame.npy                   int32   (frames,)
+    timestamp.npy               float32 (frames,)  seconds, ascending
+    landmarks_{x,y,z,visibility}.npy  float16 (frames, landmarks)
+    <metric>.npy                float32 (frames,)  derived per-frame metrics
+
+Author: ScoutVision Team
+Version: 2.0.0
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LANDMARK_COMPONENTS = ("x", "y", "z", "visibility")
+METRIC_COLUMNS = ("center_x", "center_y", "shoulder_width", "body_lean", "stability", "speed")
+_VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class LandmarkWriter:
+    """Accumulates per-frame landmarks for one video and writes them as columns"""
+
+    def __init__(self, store: "LandmarkStore", video_id: str, landmark_names: Sequence[str]):
+        self.store = store
+        self.video_id = video_id
+        self.landmark_names = list(landmark_names)
+        self._frames: List[int] = []
+        self._timestamps: List[float] = []
+        self._landmarks: List[np.ndarray] = []
+        self._metrics: Dict[str, List[float]] = {name: [] for name in METRIC_COLUMNS if name != "speed"}
+
+    def __len__(self):
+        return len(self._frames)
+
+    def append(self, frame_index: int, timestamp: float, landmarks: np.ndarray, metrics: Dict[str, float]):
+        """Record one frame; landmarks has shape (landmarks, 4) as x, y, z, visibility"""
+        self._frames.append(frame_index)
+        self._timestamps.append(timestamp)
+        self._landmarks.append(np.asarray(landmarks, dtype=np.float32))
+        for name, values in self._metrics.items():
+            values.append(metrics.get(name, np.nan))
+
+    def close(self, fps: float, source: Optional[str] = None,
+              decoded_from: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Write all columns and atomically publish them under the video id. Frame
+        indices and fps refer to source; decoded_from records the proxy that was
+        actually decoded, if any.
+        """
+        n = len(self._frames)
+        columns: Dict[str, np.ndarray] = {
+            "frame": np.asarray(self._frames, dtype=np.int32),
+            "timestamp": np.asarray(self._timestamps, dtype=np.float32),
+        }
+
+        landmarks = (np.stack(self._landmarks) if n
+                     else np.zeros((0, len(self.landmark_names), len(LANDMARK_COMPONENTS)), dtype=np.float32))
+        for i, component in enumerate(LANDMARK_COMPONENTS):
+            columns[f"landmarks_{component}"] = landmarks[:, :, i].astype(np.float16)
+
+        for name, values in self._metrics.items():
+            columns[name] = np.asarray(values, dtype=np.float32)
+        # Per-frame displacement of the center of mass, as used by the movement scores
+        speed = np.zeros(n, dtype=np.float32)
+        if n > 1:
+            speed[1:] = np.hypot(np.diff(columns["center_x"]), np.diff(columns["center_y"]))
+        columns["speed"] = speed
+
+        meta = {
+            "video_id": self.video_id,
+            "source": source,
+            "fps": fps,
+            "decoded_from": decoded_from,
+            "frames": n,
+            "duration": float(columns["timestamp"][-1]) if n else 0.0,
+            "landmark_names": self.landmark_names,
+            "landmark_components": list(LANDMARK_COMPONENTS),
+            "metric_columns": list(METRIC_COLUMNS),
+            "created_at": datetime.now().isoformat(),
+        }
+        self.store._publish(self.video_id, columns, meta)
+        return meta
+
+
+class LandmarkStore:
+    """Directory of memory-mapped landmark columns, one subdirectory per video"""
+
+    def __init__(self, root: str = "landmark_store", max_open: int = 64):
+        self.root = root
+        self.max_open = max_open
+        self._open: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def writer(self, video_id: str, landmark_names: Sequence[str]) -> LandmarkWriter:
+        self._check_id(video_id)
+        return LandmarkWriter(self, video_id, landmark_names)
+
+    def exists(self, video_id: str) -> bool:
+        return self._valid_id(video_id) and os.path.isfile(os.path.join(self.root, video_id, "meta.json"))
+
+    def list_videos(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.root) if self.exists(name))
+
+    def metadata(self, video_id: str) -> Dict[str, Any]:
+        return dict(self._load(video_id)["meta"])
+
+    def query(self, video_id: str, start: Optional[float] = None, end: Optional[float] = None,
+              landmarks: Optional[Sequence[Union[int, str]]] = None,
+              components: Optional[Sequence[str]] = None,
+              metrics: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Return the columns for frames with start <= timestamp <= end.
+
+        landmarks selects a subset by index or name, components a subset of
+        x/y/z/visibility and metrics a subset of the derived metric columns.
+        Only the selected row range of each requested column is read.
+        """
+        entry = self._load(video_id)
+        meta, columns = entry["meta"], entry["columns"]
+
+        timestamps = columns["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+
+        landmark_idx = self._landmark_indices(meta, landmarks)
+        components = list(components) if components is not None else list(LANDMARK_COMPONENTS)
+        metrics = list(metrics) if metrics is not None else list(METRIC_COLUMNS)
+        for name in components:
+            if name not in LANDMARK_COMPONENTS:
+                raise ValueError(f"Unknown landmark component: {name}")
+        for name in metrics:
+            if name not in METRIC_COLUMNS:
+                raise ValueError(f"Unknown metric column: {name}")
+
+        result = {
+            "frame": np.array(columns["frame"][lo:hi]),
+            "timestamp": np.array(timestamps[lo:hi]),
+        }
+        for component in components:
+            column = columns[f"landmarks_{component}"][lo:hi]
+            result[f"landmarks_{component}"] = np.array(
+                column if landmark_idx is None else column[:, landmark_idx]
+            )
+        for name in metrics:
+            result[name] = np.array(columns[name][lo:hi])
+        return result
+
+    def delete(self, video_id: str) -> bool:
+        self._check_id(video_id)
+        with self._lock:
+            self._open.pop(video_id, None)
+        path = os.path.join(self.root, video_id)
+        if not os.path.isdir(path):
+            return False
+        shutil.rmtree(path)
+        return True
+
+    def _landmark_indices(self, meta: Dict[str, Any],
+                          landmarks: Optional[Sequence[Union[int, str]]]) -> Optional[List[int]]:
+        if landmarks is None:
+            return None
+        names = meta["landmark_names"]
+        indices = []
+        for landmark in landmarks:
+            if isinstance(landmark, str) and not landmark.isdigit():
+                if landmark.upper() not in names:
+                    raise ValueError(f"Unknown landmark: {landmark}")
+                indices.append(names.index(landmark.upper()))
+            else:
+                index = int(landmark)
+                if not 0 <= index < len(names):
+                    raise ValueError(f"Landmark index out of range: {index}")
+                indices.append(index)
+        return indices
+
+    def _load(self, video_id: str) -> Dict[str, Any]:
+        if not self.exists(video_id):
+            raise KeyError(video_id)
+        with self._lock:
+            entry = self._open.get(video_id)
+            if entry is not None:
+                self._open.move_to_end(video_id)
+                return entry
+
+            path = os.path.join(self.root, video_id)
+            with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            columns = {}
+            for filename in os.listdir(path):
+                if filename.endswith(".npy"):
+                    # mmap_mode='r' keeps the data on disk until a slice is touched
+                    columns[filename[:-4]] = np.load(os.path.join(path, filename), mmap_mode="r")
+            entry = {"meta": meta, "columns": columns}
+
+            self._open[video_id] = entry
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+            return entry
+
+    def _publish(self, video_id: str, columns: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        # Write into a scratch directory and swap it in so readers never see partial columns
+        tmp_path = os.path.join(self.root, f".{video_id}.{uuid.uuid4().hex}")
+        os.makedirs(tmp_path)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), values)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+        final_path = os.path.join(self.root, video_id)
+        with self._lock:
+            self._open.pop(video_id, None)
+            if os.path.isdir(final_path):
+                old_path = f"{tmp_path}.old"
+                os.rename(final_path, old_path)
+                os.rename(tmp_path, final_path)
+                shutil.rmtree(old_path, ignore_errors=True)
+            else:
+                os.rename(tmp_path, final_path)
+        logger.info(f"Stored {meta['frames']} frames of landmarks for {video_id}")
+
+    @staticmethod
+    def _valid_id(video_id: str) -> bool:
+        return _VIDEO_ID_PATTERN.match(video_id) is not None and not video_id.startswith(".")
+
+    def _check_id(self, video_id: str):
+        if not self._valid_id(video_id):
+            raise ValueError(f"Invalid video id: {video_id}")
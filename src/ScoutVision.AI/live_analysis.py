@@ -0,0 +1,396 @@
+"""
+ScoutVision Live Analysis
+
+Rolling-window motion analysis over continuously read frame sources. A live
+session reads frames from a growing local file, a named pipe or a replayed
+local video, runs pose extraction over a sliding window and pushes the rolling
+metrics to subscribers. In realtime mode, frames that arrive while the
+analyzer is busy are dropped so that latency stays bounded under load; offline
+replays process every frame.
+
+Sources are restricted to local paths under the configured source directories;
+URLs are rejected so the service cannot be pointed at arbitrary network
+streams. Sources are opened by the session's reader thread, because opening a
+pipe blocks until a writer connects. Finished sessions release their pose
+models immediately and are evicted from the registry after a TTL.
+
+Author: ScoutVision Team
+Version: 2.0.0
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Used when the source does not report a frame rate (pipes, some containers)
+DEFAULT_FPS = 25.0
+
+# How long start() waits for the source to open before returning anyway
+OPEN_TIMEOUT = 2.0
+
+
+class FrameSource:
+    """Continuous frame reader for local files, pipes and replayed videos"""
+
+    def __init__(self, path: str, follow: bool = False, realtime: bool = True,
+                 poll_interval: float = 0.05):
+        self.path = path
+        self.follow = follow
+        self.realtime = realtime
+        self.poll_interval = poll_interval
+        self.fps = DEFAULT_FPS
+        self.frame_index = 0
+        self._cap = None
+        self._started_at = 0.0
+
+    def open(self):
+        """Open the underlying capture, raising if the source is unreadable"""
+        self._cap = cv2.VideoCapture(self.path)
+        if not self._cap.isOpened():
+            raise ValueError(f"Unable to open frame source: {self.path}")
+
+        fps = self._cap.get(cv2.CAP_PROP_FPS)
+        if fps and fps > 0:
+            self.fps = float(fps)
+        self._started_at = time.monotonic()
+
+    def read(self, stop_event: threading.Event) -> Optional[Tuple[int, float, Any]]:
+        """Return the next (frame_index, media_time, frame) or None at end of stream"""
+        while not stop_event.is_set():
+            ret, frame = self._cap.read()
+            if ret:
+                index = self.frame_index
+                self.frame_index += 1
+                media_time = index / self.fps
+                if self.realtime:
+                    # Replay at the source frame rate so the analyzer sees live pacing
+                    delay = self._started_at + media_time - time.monotonic()
+                    if delay > 0:
+                        stop_event.wait(delay)
+                return index, media_time, frame
+
+            if not self.follow:
+                return None
+
+            # Growing file: wait for more data, then reopen at the last position
+            stop_event.wait(self.poll_interval)
+            self._cap.release()
+            self._cap = cv2.VideoCapture(self.path)
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, self.frame_index)
+        return None
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+
+class LiveAnalysisSession:
+    """Sliding-window pose analysis over a single frame source"""
+
+    def __init__(self, session_id: str, source: FrameSource, tracker: Any,
+                 window_seconds: float = 5.0, sport: str = "Football",
+                 queue_size: int = 8):
+        self.session_id = session_id
+        self.source = source
+        self.tracker = tracker
+        self.window_seconds = window_seconds
+        self.sport = sport
+        self.queue_size = queue_size
+        self.status = "Active"
+        self.error: Optional[str] = None
+        self.started_at = datetime.now()
+        self.ended_at: Optional[datetime] = None
+
+        self.frames_read = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+
+        self._window: Deque[Dict[str, float]] = deque(maxlen=self._window_frames(DEFAULT_FPS))
+        self._latest_result: Dict[str, Any] = {}
+        self._pending: Optional[Tuple[int, float, Any, float]] = None
+        self._source_done = False
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._open_attempted = threading.Event()
+        self._open_error: Optional[str] = None
+        self._threads: List[threading.Thread] = []
+        self._subscribers: List[asyncio.Queue] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None, open_timeout: float = OPEN_TIMEOUT):
+        """
+        Start the reader and analyzer threads. Raises ValueError if the source
+        fails to open within open_timeout; a source still opening after that
+        (a pipe without a writer) keeps the session active and waiting.
+        """
+        self._loop = loop
+        self._latest_result = self._build_result({}, None)
+
+        self._threads = [
+            threading.Thread(target=self._read_loop, name=f"{self.session_id}-reader", daemon=True),
+            threading.Thread(target=self._analyze_loop, name=f"{self.session_id}-analyzer", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+        if not self._open_attempted.wait(open_timeout):
+            logger.info(f"Live analysis session {self.session_id} is waiting for {self.source.path}")
+        elif self._open_error is not None:
+            raise ValueError(self._open_error)
+        logger.info(f"Started live analysis session {self.session_id} on {self.source.path}")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop reading and wait for the worker threads to exit"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        if self.status == "Active":
+            self._finish("Stopped")
+        logger.info(f"Stopped live analysis session {self.session_id}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the source is exhausted and analyzed; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            thread.join(remaining)
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def get_result(self) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self._latest_result)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber queue that receives every published update"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.append(queue)
+        queue.put_nowait(self.get_result())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "id": self.session_id,
+            "stream_url": self.source.path,
+            "sport": self.sport,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "ended_at": self.ended_at.isoformat() if self.ended_at else None,
+            "metadata": {
+                "fps": self.source.fps,
+                "window_seconds": self.window_seconds,
+                "window_frames": self._window.maxlen,
+                "follow": self.source.follow,
+                "realtime": self.source.realtime,
+            },
+        }
+
+    def _window_frames(self, fps: float) -> int:
+        return max(2, int(self.window_seconds * fps))
+
+    def _open_source(self):
+        try:
+            self.source.open()
+        except Exception as e:
+            self._open_error = str(e)
+            raise
+        finally:
+            self._open_attempted.set()
+        with self._cond:
+            self._window = deque(maxlen=self._window_frames(self.source.fps))
+
+    def _read_loop(self):
+        try:
+            self._open_source()
+            while not self._stop_event.is_set():
+                item = self.source.read(self._stop_event)
+                if item is None:
+                    break
+                with self._cond:
+                    if not self.source.realtime:
+                        # Offline replay: apply backpressure instead of dropping frames
+                        while self._pending is not None and not self._stop_event.is_set():
+                            self._cond.wait()
+                    if self._pending is not None:
+                        # Analyzer is behind; keep only the freshest frame
+                        self.frames_dropped += 1
+                    self._pending = item + (time.monotonic(),)
+                    self.frames_read += 1
+                    self._cond.notify()
+        except Exception as e:
+            logger.error(f"Live frame reader failed for {self.session_id}: {str(e)}")
+            self.error = str(e)
+        finally:
+            self.source.close()
+            with self._cond:
+                self._source_done = True
+                self._cond.notify()
+
+    def _analyze_loop(self):
+        try:
+            self._run_analysis()
+        finally:
+            # The analyzer is the tracker's only user, so it releases it once done
+            self._release_tracker()
+            with self._cond:
+                self._pending = None
+
+    def _run_analysis(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._source_done and not self._stop_event.is_set():
+                    self._cond.wait()
+                if self._pending is None or self._stop_event.is_set():
+                    break
+                frame_index, media_time, frame, read_at = self._pending
+                self._pending = None
+                self._cond.notify()
+
+            try:
+                metrics = self.tracker.extract_frame_metrics(frame, frame_index)
+            except Exception as e:
+                logger.error(f"Live pose extraction failed for {self.session_id}: {str(e)}")
+                metrics = None
+
+            self.frames_processed += 1
+            if metrics:
+                metrics["timestamp"] = media_time
+                self._window.append(metrics)
+
+            rolling = self.tracker.analyze_movement_patterns(list(self._window))
+            latency_ms = (time.monotonic() - read_at) * 1000
+            result = self._build_result(rolling, media_time, latency_ms)
+            with self._cond:
+                self._latest_result = result
+            self._publish(result)
+
+        if not self._stop_event.is_set():
+            self._finish("Error" if self.error else "Completed")
+
+    def _release_tracker(self):
+        tracker, self.tracker = self.tracker, None
+        close = getattr(tracker, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception as e:
+                logger.error(f"Failed to release tracker for {self.session_id}: {str(e)}")
+
+    def _finish(self, status: str):
+        self.status = status
+        self.ended_at = datetime.now()
+        with self._cond:
+            self._latest_result = dict(self._latest_result, status=status)
+            result = dict(self._latest_result)
+        self._publish(result)
+
+    def _build_result(self, rolling: Dict[str, Any], media_time: Optional[float],
+                      latency_ms: Optional[float] = None) -> Dict[str, Any]:
+        media_time = media_time or 0.0
+        return {
+            "session_id": self.session_id,
+            "status": self.status,
+            "current_minute": int(media_time // 60),
+            "current_second": round(media_time, 3),
+            "rolling_metrics": rolling,
+            "window_frames": len(self._window),
+            "frames_read": self.frames_read,
+            "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+            "latency_ms": round(latency_ms, 2) if latency_ms is not None else None,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def _publish(self, result: Dict[str, Any]):
+        if self._loop is None or not self._subscribers or self._loop.is_closed():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, result)
+        except RuntimeError:
+            # Event loop shut down underneath us
+            pass
+
+    def _deliver(self, result: Dict[str, Any]):
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Slow subscriber; drop its oldest update rather than block the analyzer
+                queue.get_nowait()
+            queue.put_nowait(result)
+
+
+class LiveAnalysisManager:
+    """Registry of live analysis sessions served by the AI API"""
+
+    def __init__(self, tracker_factory: Callable[[], Any], source_roots: Sequence[str] = ("uploads",),
+                 finished_ttl: float = 600.0):
+        self.tracker_factory = tracker_factory
+        self.source_roots = [os.path.realpath(root) for root in source_roots]
+        self.finished_ttl = finished_ttl
+        self.sessions: Dict[str, LiveAnalysisSession] = {}
+
+    def resolve_source(self, stream_url: str) -> str:
+        """Local path for stream_url, if it is inside one of the source directories"""
+        if "://" in stream_url:
+            raise ValueError("Live analysis sources must be local files or pipes, not URLs")
+        path = os.path.realpath(stream_url)
+        if not any(path == root or path.startswith(root + os.sep) for root in self.source_roots):
+            raise ValueError(f"Live analysis source is outside the allowed directories: {stream_url}")
+        if not os.path.exists(path):
+            raise ValueError(f"Live analysis source does not exist: {stream_url}")
+        return path
+
+    def start_session(self, stream_url: str, sport: str = "Football", window_seconds: float = 5.0,
+                      follow: bool = False, realtime: bool = True,
+                      loop: Optional[asyncio.AbstractEventLoop] = None) -> LiveAnalysisSession:
+        self.evict_finished()
+        source = FrameSource(self.resolve_source(stream_url), follow=follow, realtime=realtime)
+        session_id = f"live_{uuid.uuid4().hex[:12]}"
+        # Each session gets its own tracker: pose models carry per-stream state
+        session = LiveAnalysisSession(session_id, source, self.tracker_factory(),
+                                      window_seconds=window_seconds, sport=sport)
+        try:
+            session.start(loop)
+        except Exception:
+            session.stop()
+            session._release_tracker()
+            raise
+        self.sessions[session_id] = session
+        return session
+
+    def get_session(self, session_id: str) -> Optional[LiveAnalysisSession]:
+        self.evict_finished()
+        return self.sessions.get(session_id)
+
+    def evict_finished(self):
+        """Forget sessions that ended more than finished_ttl seconds ago"""
+        cutoff = datetime.now() - timedelta(seconds=self.finished_ttl)
+        for session_id, session in list(self.sessions.items()):
+            if session.ended_at is not None and session.ended_at <= cutoff:
+                self.sessions.pop(session_id, None)
+
+    def stop_session(self, session_id: str) -> Optional[LiveAnalysisSession]:
+        session = self.sessions.pop(session_id, None)
+        if session:
+            session.stop()
+        return session
+
+    def stop_all(self):
+        for session_id in list(self.sessions):
+            self.stop_session(session_id)
@@ -0,0 +1,264 @@
+"""
+ScoutVision Cohort Percentile Sketches
+
+Mergeable t-digest quantile sketches kept per metric, position and league.
+Sketches are updated incrementally as analyses finish and persisted to disk,
+so a score can be turned into a percentile against its cohort without sorting
+the population on every request. Each lookup is a single interpolation over
+the sketch's bounded set of centroids.
+
+Author: ScoutVision Team
+Version: 2.0.0
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANY = "*"
+
+
+class TDigest:
+    """Merging t-digest (Dunning & Ertl) with the arcsine scale function"""
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[float] = []
+        self._buffer_weights: List[float] = []
+        self._buffer_limit = int(5 * compression)
+        # Interpolation tables rebuilt on compression: cumulative weight <-> value
+        self._cum = np.empty(0, dtype=np.float64)
+        self._values = np.empty(0, dtype=np.float64)
+        # Same for cdf, with tied centroids collapsed to their mid-rank
+        self._cdf_cum = np.empty(0, dtype=np.float64)
+        self._cdf_values = np.empty(0, dtype=np.float64)
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum()) + float(sum(self._buffer_weights))
+
+    def add(self, value: float, weight: float = 1.0):
+        value = float(value)
+        if math.isnan(value):
+            return
+        self._buffer.append(value)
+        self._buffer_weights.append(weight)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        """Fold another digest into this one"""
+        other._flush()
+        self._buffer.extend(other.means.tolist())
+        self._buffer_weights.extend(other.weights.tolist())
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q in [0, 1]"""
+        self._flush()
+        if not len(self.means):
+            return math.nan
+        return float(np.interp(q * self._cum[-1], self._cum, self._values))
+
+    def cdf(self, value: float) -> float:
+        """Mid-rank fraction of the population: share below value plus half the share equal to it"""
+        self._flush()
+        if not len(self.means):
+            return math.nan
+        return float(np.interp(value, self._cdf_values, self._cdf_cum, left=0.0, right=self._cum[-1])
+                     / self._cum[-1])
+
+    def to_dict(self) -> Dict[str, object]:
+        self._flush()
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "min": self.min if self.means.size else None,
+            "max": self.max if self.means.size else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "TDigest":
+        digest = cls(data.get("compression", 100.0))
+        digest.means = np.asarray(data["means"], dtype=np.float64)
+        digest.weights = np.asarray(data["weights"], dtype=np.float64)
+        if digest.means.size:
+            digest.min = float(data["min"])
+            digest.max = float(data["max"])
+        digest._rebuild_tables()
+        return digest
+
+    def _flush(self):
+        if self._buffer:
+            self._compress()
+
+    def _scale(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self):
+        means = np.concatenate([self.means, np.asarray(self._buffer, dtype=np.float64)])
+        weights = np.concatenate([self.weights, np.asarray(self._buffer_weights, dtype=np.float64)])
+        self._buffer, self._buffer_weights = [], []
+        if not len(means):
+            return
+
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+
+        new_means = [means[0]]
+        new_weights = [weights[0]]
+        weight_before = 0.0
+        k_lower = self._scale(0.0)
+        for mean, weight in zip(means[1:].tolist(), weights[1:].tolist()):
+            proposed = new_weights[-1] + weight
+            if self._scale((weight_before + proposed) / total) - k_lower <= 1.0:
+                new_means[-1] += (mean - new_means[-1]) * weight / proposed
+                new_weights[-1] = proposed
+            else:
+                weight_before += new_weights[-1]
+                k_lower = self._scale(weight_before / total)
+                new_means.append(mean)
+                new_weights.append(weight)
+
+        self.means = np.asarray(new_means)
+        self.weights = np.asarray(new_weights)
+        self._rebuild_tables()
+
+    def _rebuild_tables(self):
+        if not len(self.means):
+            self._cum = self._values = np.empty(0, dtype=np.float64)
+            self._cdf_cum = self._cdf_values = np.empty(0, dtype=np.float64)
+            return
+        ends = np.cumsum(self.weights)
+        total = ends[-1]
+        centers = ends - self.weights / 2
+        self._cum = np.concatenate([[0.0], centers, [total]])
+        self._values = np.concatenate([[self.min], self.means, [self.max]])
+
+        # Runs of centroids with the same mean are tied values: place the run at the
+        # middle of the weight it spans, so a value shared by everyone is the 50th percentile
+        values, first = np.unique(self.means, return_index=True)
+        last = np.append(first[1:], len(self.means)) - 1
+        cum = (ends[first] - self.weights[first] + ends[last]) / 2
+        if self.min < values[0]:
+            values, cum = np.concatenate([[self.min], values]), np.concatenate([[0.0], cum])
+        if self.max > values[-1]:
+            values, cum = np.concatenate([values, [self.max]]), np.concatenate([cum, [total]])
+        self._cdf_values, self._cdf_cum = values, cum
+
+
+class CohortPercentiles:
+    """Per-metric t-digests for every position/league cohort, persisted as JSON"""
+
+    def __init__(self, path: Optional[str] = None, compression: float = 100.0,
+                 min_count: int = 30, autosave_every: int = 100):
+        self.path = path
+        self.compression = compression
+        self.min_count = min_count
+        self.autosave_every = autosave_every
+        self.digests: Dict[Tuple[str, str, str], TDigest] = {}
+        self._lock = threading.Lock()
+        self._dirty = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def _cohorts(position: Optional[str], league: Optional[str]) -> List[Tuple[str, str]]:
+        """Cohorts from most to least specific that a player belongs to"""
+        position = position.strip().lower() if position else None
+        league = league.strip().lower() if league else None
+        cohorts = []
+        if position and league:
+            cohorts.append((position, league))
+        if position:
+            cohorts.append((position, ANY))
+        if league:
+            cohorts.append((ANY, league))
+        cohorts.append((ANY, ANY))
+        return cohorts
+
+    def record(self, metrics: Dict[str, float], position: Optional[str] = None,
+               league: Optional[str] = None):
+        """Add one player's metrics to every cohort they belong to"""
+        with self._lock:
+            for cohort in self._cohorts(position, league):
+                for metric, value in metrics.items():
+                    key = (metric,) + cohort
+                    digest = self.digests.get(key)
+                    if digest is None:
+                        digest = self.digests[key] = TDigest(self.compression)
+                    digest.add(value)
+            self._dirty += 1
+            autosave = self.path and self._dirty >= self.autosave_every
+        if autosave:
+            self.save()
+
+    def percentile(self, metric: str, value: float, position: Optional[str] = None,
+                   league: Optional[str] = None) -> Optional[float]:
+        """Percentile (0-100) of value in the most specific cohort with enough data"""
+        with self._lock:
+            for cohort in self._cohorts(position, league):
+                digest = self.digests.get((metric,) + cohort)
+                if digest is not None and digest.count >= self.min_count:
+                    return round(100.0 * digest.cdf(value), 2)
+        return None
+
+    def percentiles(self, metrics: Dict[str, float], position: Optional[str] = None,
+                    league: Optional[str] = None) -> Dict[str, float]:
+        """Percentiles for every metric that has a large enough cohort"""
+        result = {}
+        for metric, value in metrics.items():
+            percentile = self.percentile(metric, value, position, league)
+            if percentile is not None:
+                result[metric] = percentile
+        return result
+
+    def quantiles(self, metric: str, qs: Iterable[float], position: Optional[str] = None,
+                  league: Optional[str] = None) -> Optional[Dict[str, float]]:
+        with self._lock:
+            for cohort in self._cohorts(position, league):
+                digest = self.digests.get((metric,) + cohort)
+                if digest is not None and digest.count >= self.min_count:
+                    return {f"p{int(q * 100)}": round(digest.quantile(q), 4) for q in qs}
+        return None
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {"|".join(key): digest.to_dict() for key, digest in self.digests.items()}
+            self._dirty = 0
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to load percentile sketches from {self.path}: {str(e)}")
+            return
+        with self._lock:
+            self.digests = {
+                tuple(key.split("|")): TDigest.from_dict(value) for key, value in data.items()
+            }
+        logger.info(f"Loaded {len(self.digests)} percentile sketches from {self.path}")
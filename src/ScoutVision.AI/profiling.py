@@ -0,0 +1,366 @@
+"""
+ScoutVision Request Profiling
+
+Opt-in profiling for slow requests. Profiling is disabled unless an access
+token is configured. With a token, a client can profile a single request by
+sending ``X-ScoutVision-Profile: cprofile`` (deterministic, saved as pstats) or
+``X-ScoutVision-Profile: sample`` (stack sampling, saved as speedscope JSON)
+together with ``X-ScoutVision-Profile-Token``. An admin can also sample every
+thread of the process for a time window. Profiles are kept in one directory
+and the oldest are removed once the retention limit is reached.
+
+A request profile covers the event-loop thread plus any worker thread the
+request hands work to through ``run_in_thread``. In cprofile mode, each
+worker gets its own profiler and the results are merged into one pstats
+file. In sample mode, the worker threads join the sampled set while they
+run. Other requests that run on the event loop during the capture show up
+in its loop-thread portion.
+
+Without a token the middleware checks a single attribute per request and calls
+the app directly. With a token, requests that do not ask for a profile cost
+one scan of their headers.
+
+Author: ScoutVision Team
+Version: 2.0.0
+"""
+
+import asyncio
+import cProfile
+import hmac
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-scoutvision-profile"
+TOKEN_HEADER = "x-scoutvision-profile-token"
+PROFILE_ID_HEADER = "x-scoutvision-profile-id"
+_PROFILE_HEADER_KEY = PROFILE_HEADER.encode()
+_TOKEN_HEADER_KEY = TOKEN_HEADER.encode()
+_PROFILE_ID_HEADER_KEY = PROFILE_ID_HEADER.encode()
+
+MODES = ("cprofile", "sample")
+EXTENSIONS = {"cprofile": ".pstats", "sample": ".speedscope.json"}
+MAX_WINDOW_SECONDS = 300.0
+PROFILE_ID_PATTERN = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+
+
+class SamplingProfiler:
+    """Samples Python stacks from a background thread and renders them as a speedscope profile"""
+
+    def __init__(self, interval: float = 0.005, thread_ids: Optional[List[int]] = None):
+        self.interval = interval
+        # None samples every thread; a set may grow while sampling as workers join
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.frames: List[Tuple[str, str, int]] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        # Seconds of wall time attributed to each stack, per thread
+        self.samples: Dict[int, Counter] = {}
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="scoutvision-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.stopped_at = time.perf_counter()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            # Busy threads hold the GIL past the interval, so weight by the time actually elapsed
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                self.samples.setdefault(thread_id, Counter())[self._stack(frame)] += elapsed
+
+    def _stack(self, frame) -> Tuple[int, ...]:
+        """Frame indices from the outermost call to the innermost"""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self._frame_index.get(key)
+            if index is None:
+                index = self._frame_index[key] = len(self.frames)
+                self.frames.append(key)
+            stack.append(index)
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        profiles = []
+        for thread_id, stacks in self.samples.items():
+            weights = [round(seconds, 6) for seconds in stacks.values()]
+            profiles.append({
+                "type": "sampled",
+                "name": f"{name} [{thread_names.get(thread_id, thread_id)}]",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": [list(stack) for stack in stacks],
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "scoutvision-profiling",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": n, "file": f, "line": line} for n, f, line in self.frames]},
+            "profiles": profiles,
+        }
+
+
+class ProfileStore:
+    """Directory of saved profiles, pruned to the newest max_profiles"""
+
+    def __init__(self, directory: str, max_profiles: int = 50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    def file_path(self, profile_id: str, mode: str) -> str:
+        return os.path.join(self.directory, profile_id + EXTENSIONS[mode])
+
+    def save_metadata(self, profile_id: str, metadata: Dict[str, Any]):
+        with open(os.path.join(self.directory, f"{profile_id}.meta.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+        self.prune()
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Saved profiles, newest first"""
+        profiles = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".meta.json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+
+    def path(self, profile_id: str) -> Optional[str]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        for mode in MODES:
+            candidate = self.file_path(profile_id, mode)
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def prune(self):
+        with self._lock:
+            for profile in self.list()[self.max_profiles:]:
+                for name in (profile["id"] + EXTENSIONS[profile["mode"]], profile["id"] + ".meta.json"):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
+
+
+class ProfileCapture:
+    """One running capture plus the worker-thread profiles collected for it"""
+
+    def __init__(self, profile_id: str, mode: str, profiler: Any):
+        self.id = profile_id
+        self.mode = mode
+        self.profiler = profiler
+        self.worker_profiles: List[cProfile.Profile] = []
+        self.created_at = time.time()
+        self.started = time.perf_counter()
+
+    def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call func on the current worker thread with this capture covering it"""
+        if self.mode == "sample":
+            thread_id = threading.get_ident()
+            if self.profiler.thread_ids is None:
+                return func(*args, **kwargs)
+            self.profiler.thread_ids.add(thread_id)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.profiler.thread_ids.discard(thread_id)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Interpreters that allow a single active profiler run the worker unprofiled
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self.worker_profiles.append(profile)
+
+
+class RequestProfiler:
+    """Runs at most one capture at a time and writes it to the profile store"""
+
+    def __init__(self, store: ProfileStore, token: Optional[str] = None, sample_interval: float = 0.005):
+        self.store = store
+        self.token = token
+        self.sample_interval = sample_interval
+        self.enabled = bool(token)
+        self.window: Optional[Dict[str, Any]] = None
+        self._busy = threading.Lock()
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return self.enabled and token is not None and hmac.compare_digest(token, self.token)
+
+    def begin(self, mode: str, thread_ids: Optional[List[int]] = None) -> Optional[ProfileCapture]:
+        """Start a capture; None if another capture is already running"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        if not self._busy.acquire(blocking=False):
+            return None
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = SamplingProfiler(self.sample_interval, thread_ids)
+            profiler.start()
+        return ProfileCapture(self.store.new_id(), mode, profiler)
+
+    def end(self, capture: ProfileCapture, name: str, **details) -> Dict[str, Any]:
+        try:
+            mode = capture.mode
+            if mode == "cprofile":
+                capture.profiler.disable()
+            else:
+                capture.profiler.stop()
+            duration = time.perf_counter() - capture.started
+            path = self.store.file_path(capture.id, mode)
+            if mode == "cprofile":
+                stats = pstats.Stats(capture.profiler)
+                for worker_profile in capture.worker_profiles:
+                    stats.add(worker_profile)
+                stats.dump_stats(path)
+                threads = 1 + len(capture.worker_profiles)
+            else:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(capture.profiler.to_speedscope(name), f)
+                threads = len(capture.profiler.samples)
+            metadata = {
+                "id": capture.id,
+                "name": name,
+                "mode": mode,
+                "format": "pstats" if mode == "cprofile" else "speedscope",
+                "created_at": datetime.fromtimestamp(capture.created_at).isoformat(),
+                "duration_ms": round(duration * 1000, 2),
+                "threads": threads,
+                "size_bytes": os.path.getsize(path),
+                **details,
+            }
+            self.store.save_metadata(capture.id, metadata)
+            logger.info(f"Saved {mode} profile {capture.id} for {name}")
+            return metadata
+        finally:
+            self._busy.release()
+
+    def start_window(self, seconds: float, mode: str = "sample") -> Dict[str, Any]:
+        """Sample every thread of the process for a fixed number of seconds"""
+        if mode != "sample":
+            # cProfile hooks only the thread that enables it and must be disabled from that thread
+            raise ValueError("Time window profiles only support sample mode")
+        seconds = min(max(seconds, 0.1), MAX_WINDOW_SECONDS)
+        capture = self.begin(mode)
+        if capture is None:
+            raise RuntimeError("Another profile is already being captured")
+        self.window = {"mode": mode, "seconds": seconds, "started_at": datetime.now().isoformat()}
+        timer = threading.Timer(seconds, self._finish_window, args=(capture, seconds))
+        timer.daemon = True
+        timer.start()
+        return self.window
+
+    def _finish_window(self, capture: ProfileCapture, seconds: float):
+        try:
+            self.window = {**self.window, "profile": self.end(capture, f"window {seconds:g}s", window_seconds=seconds)}
+        except Exception as e:
+            logger.error(f"Failed to save window profile: {str(e)}")
+            self.window = None
+
+
+_active_capture: ContextVar[Optional[ProfileCapture]] = ContextVar("scoutvision_profile_capture", default=None)
+
+
+async def run_in_thread(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """asyncio.to_thread that extends the current request's profile to the worker thread"""
+    capture = _active_capture.get()
+    if capture is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return await asyncio.to_thread(capture.run, func, *args, **kwargs)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests carrying the profile header"""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if not self.profiler.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        mode = token = None
+        for key, value in scope["headers"]:
+            if key == _PROFILE_HEADER_KEY:
+                mode = value
+            elif key == _TOKEN_HEADER_KEY:
+                token = value
+        if mode is None:
+            return await self.app(scope, receive, send)
+        mode = mode.decode("latin-1").strip().lower()
+        if mode not in MODES or not self.profiler.authorized(token.decode("latin-1") if token else None):
+            return await self.app(scope, receive, send)
+
+        # The loop thread is covered from the start; run_in_thread adds the request's workers
+        capture = self.profiler.begin(mode, thread_ids=[threading.get_ident()])
+        if capture is None:
+            return await self.app(scope, receive, send)
+
+        status = {}
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) +
+                           [(_PROFILE_ID_HEADER_KEY, capture.id.encode())]}
+            await send(message)
+
+        token = _active_capture.set(capture)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _active_capture.reset(token)
+            self.profiler.end(capture, f"{scope['method']} {scope['path']}", method=scope["method"],
+                              path=scope["path"], status_code=status.get("code"))
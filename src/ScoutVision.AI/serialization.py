@@ -0,0 +1,151 @@
+"""
+ScoutVision Response Serialization
+
+Content negotiation for analysis responses. Summary scores are always JSON,
+encoded with orjson when it is installed. Per-frame numeric series (speed,
+center of mass, landmarks) either go inline as JSON arrays or, when the client
+sends ``Accept: multipart/mixed``, as raw NumPy ``.npy`` parts next to the JSON
+summary. The binary form is a fraction of the size and needs no float
+formatting or parsing.
+
+Author: ScoutVision Team
+Version: 2.0.0
+"""
+
+import io
+import json
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder is the fallback
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+NPY_MEDIA_TYPE = "application/x-npy"
+MULTIPART_MEDIA_TYPE = "multipart/mixed"
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+                            default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson when available"""
+
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+def wants_binary(accept: Optional[str]) -> bool:
+    """True if the Accept header prefers multipart/mixed (with .npy parts) over JSON"""
+    if not accept:
+        return False
+    preferences = {}
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        preferences[media_type.lower()] = quality
+    binary = preferences.get(MULTIPART_MEDIA_TYPE, 0.0)
+    text = max(preferences.get(JSON_MEDIA_TYPE, 0.0), preferences.get("*/*", 0.0))
+    return binary > 0 and binary >= text
+
+
+def encode_npy(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def encode_multipart(summary: Dict[str, Any], series: Dict[str, np.ndarray]) -> Tuple[bytes, str]:
+    """JSON summary part followed by one application/x-npy part per series"""
+    boundary = f"scoutvision-{uuid.uuid4().hex}"
+    chunks = [
+        f"--{boundary}\r\nContent-Type: {JSON_MEDIA_TYPE}\r\n"
+        f"Content-Disposition: inline; name=\"summary\"\r\n\r\n".encode(),
+        dumps_json(summary),
+        b"\r\n",
+    ]
+    for name, values in series.items():
+        payload = encode_npy(np.asarray(values))
+        chunks.extend([
+            f"--{boundary}\r\nContent-Type: {NPY_MEDIA_TYPE}\r\n"
+            f"Content-Disposition: attachment; name=\"{name}\"\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode(),
+            payload,
+            b"\r\n",
+        ])
+    chunks.append(f"--{boundary}--\r\n".encode())
+    return b"".join(chunks), f"{MULTIPART_MEDIA_TYPE}; boundary={boundary}"
+
+
+def decode_multipart(body: bytes, content_type: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Client-side inverse of encode_multipart"""
+    boundary = content_type.split("boundary=", 1)[1].strip()
+    delimiter = f"--{boundary}".encode()
+    summary: Dict[str, Any] = {}
+    series: Dict[str, np.ndarray] = {}
+
+    position = body.index(delimiter) + len(delimiter)
+    while not body.startswith(b"--", position):
+        header_end = body.index(b"\r\n\r\n", position)
+        headers = {}
+        for line in body[position:header_end].decode().strip().split("\r\n"):
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+        name = headers["content-disposition"].split('name="', 1)[1].split('"', 1)[0]
+
+        start = header_end + 4
+        if "content-length" in headers:
+            end = start + int(headers["content-length"])
+        else:
+            end = body.index(b"\r\n" + delimiter, start)
+        payload = body[start:end]
+
+        if headers["content-type"] == NPY_MEDIA_TYPE:
+            series[name] = np.load(io.BytesIO(payload), allow_pickle=False)
+        else:
+            summary = json.loads(payload)
+        position = body.index(delimiter, end) + len(delimiter)
+    return summary, series
+
+
+def negotiate(accept: Optional[str], summary: Dict[str, Any], series: Dict[str, np.ndarray],
+              series_key: Tuple[str, ...] = ("series",)) -> Response:
+    """
+    Build the response the client asked for. For JSON the series are nested
+    into the summary at series_key; for multipart they become .npy parts.
+    """
+    if wants_binary(accept):
+        body, content_type = encode_multipart(summary, series)
+        return Response(content=body, media_type=content_type)
+
+    if series:
+        target = summary
+        for key in series_key[:-1]:
+            target = target.setdefault(key, {})
+        target[series_key[-1]] = {name: np.asarray(values) for name, values in series.items()}
+    return FastJSONResponse(summary)
@@ -0,0 +1,331 @@
+"""
+ScoutVision Player Similarity Index
+
+Nearest-neighbour search over the standardized talent feature vectors used by
+the talent predictor. Players are partitioned by position and league, each
+partition holding a KD-tree over its bulk rows plus a small brute-force delta
+of recent inserts, so upserts are cheap and queries stay in the millisecond
+range for millions of players. The delta is folded into the tree once it grows
+past a fraction of the partition (capped at max_delta rows), and a partition
+is rebuilt once removals or moves leave too many tombstones in its tree.
+
+The index is persisted as NumPy columns (ids, raw features, partition) and
+reloaded through bulk_load on start-up. Raw features are stored so that a
+refitted scaler re-standardizes them on load. All public methods are
+thread-safe, so callers can run tree rebuilds off the event loop.
+
+Author: ScoutVision Team
+Version: 2.0.0
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sklearn.neighbors import KDTree
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+# Talent feature vector layout and the defaults used for missing values
+FEATURE_DEFAULTS = {
+    'age': 20,
+    'technical_score': 5,
+    'physical_score': 5,
+    'tactical_score': 5,
+    'mental_score': 5,
+    'speed': 50,
+    'agility': 50,
+    'stability': 50,
+    'experience_years': 2,
+}
+FEATURE_NAMES = list(FEATURE_DEFAULTS)
+
+PartitionKey = Tuple[str, str]
+
+
+def _normalize(value: Optional[str]) -> str:
+    return (value or "unknown").strip().lower()
+
+
+class _Partition:
+    """Players of one position/league: KD-tree over rows [0, tree_size) plus a delta"""
+
+    def __init__(self, dims: int):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.empty((0, dims), dtype=np.float64)
+        self.alive = np.empty(0, dtype=bool)
+        self.size = 0
+        self.tree: Optional[KDTree] = None
+        self.tree_size = 0
+        self.dead = 0
+
+    def append(self, player_id: int, vector: np.ndarray) -> int:
+        if self.size == len(self.ids):
+            capacity = max(16, 2 * len(self.ids))
+            self.ids = np.resize(self.ids, capacity)
+            self.alive = np.resize(self.alive, capacity)
+            vectors = np.empty((capacity, self.vectors.shape[1]), dtype=np.float64)
+            vectors[:self.size] = self.vectors[:self.size]
+            self.vectors = vectors
+        row = self.size
+        self.ids[row] = player_id
+        self.vectors[row] = vector
+        self.alive[row] = True
+        self.size += 1
+        return row
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[float, int]]:
+        """Return up to k (distance, row) pairs for live rows, nearest first"""
+        found: List[Tuple[float, int]] = []
+
+        if self.tree is not None and self.tree_size:
+            # Requery with a growing k until tombstones no longer shadow k live rows
+            n = min(self.tree_size, 2 * k if self.dead else k)
+            while True:
+                dist, idx = self.tree.query(vector.reshape(1, -1), k=n)
+                live = self.alive[idx[0]]
+                if live.sum() >= k or n == self.tree_size:
+                    break
+                n = min(self.tree_size, 4 * n)
+            found.extend(zip(dist[0][live].tolist(), idx[0][live].tolist()))
+
+        if self.size > self.tree_size:
+            delta = self.vectors[self.tree_size:self.size]
+            dist = np.sqrt(((delta - vector) ** 2).sum(axis=1))
+            rows = np.arange(self.tree_size, self.size)
+            mask = self.alive[self.tree_size:self.size]
+            found.extend(zip(dist[mask].tolist(), rows[mask].tolist()))
+
+        found.sort()
+        return found[:k]
+
+    def rebuild(self) -> Dict[int, int]:
+        """Drop tombstones, rebuild the tree over all rows and return the new player rows"""
+        keep = np.flatnonzero(self.alive[:self.size])
+        self.ids = self.ids[keep].copy()
+        self.vectors = self.vectors[keep].copy()
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.size = len(keep)
+        self.dead = 0
+        self.tree = KDTree(self.vectors) if self.size else None
+        self.tree_size = self.size
+        return {int(player_id): row for row, player_id in enumerate(self.ids)}
+
+
+class PlayerSimilarityIndex:
+    """Standardized k-NN index over player feature vectors, filtered by position and league"""
+
+    def __init__(self, scaler: StandardScaler, rebuild_ratio: float = 0.1, min_delta: int = 256,
+                 max_delta: int = 8192, path: Optional[str] = None, autosave_every: int = 1000):
+        self.scaler = scaler
+        self.rebuild_ratio = rebuild_ratio
+        self.min_delta = min_delta
+        self.max_delta = max_delta
+        self.path = path
+        self.autosave_every = autosave_every
+        self.partitions: Dict[PartitionKey, _Partition] = {}
+        self._rows: Dict[int, Tuple[PartitionKey, int]] = {}
+        self._lock = threading.RLock()
+        self._dirty = 0
+        if path and os.path.exists(os.path.join(path, "index.json")):
+            self.load()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rows)
+
+    def __contains__(self, player_id: int):
+        with self._lock:
+            return player_id in self._rows
+
+    @staticmethod
+    def raw_vector(features: Dict[str, float]) -> np.ndarray:
+        return np.array([features.get(name, FEATURE_DEFAULTS[name]) for name in FEATURE_NAMES], dtype=np.float64)
+
+    def feature_vector(self, features: Dict[str, float]) -> np.ndarray:
+        """Standardize a feature dict the same way the talent predictor does"""
+        return self.scaler.transform(self.raw_vector(features).reshape(1, -1))[0]
+
+    def upsert(self, player_id: int, features: Dict[str, float], position: str, league: Optional[str] = None):
+        """Insert a player or replace their previous vector and partition"""
+        vector = self.feature_vector(features)
+        with self._lock:
+            self._upsert_scaled(player_id, vector, position, league)
+            self._dirty += 1
+            autosave = self.path and self._dirty >= self.autosave_every
+        if autosave:
+            self.save()
+
+    def bulk_load(self, player_ids: Iterable[int], raw_vectors: np.ndarray,
+                  positions: Iterable[str], leagues: Iterable[Optional[str]]):
+        """Insert many players at once and build each touched partition's tree a single time"""
+        scaled = self.scaler.transform(np.asarray(raw_vectors, dtype=np.float64).reshape(-1, len(FEATURE_NAMES)))
+        with self._lock:
+            touched = set()
+            for player_id, vector, position, league in zip(player_ids, scaled, positions, leagues):
+                previous = self._rows.get(int(player_id))
+                if previous is not None:
+                    touched.add(previous[0])
+                touched.add(self._upsert_scaled(int(player_id), vector, position, league, rebuild=False))
+            for key in touched:
+                self._rebuild(key)
+            self._dirty += len(scaled)
+
+    def remove(self, player_id: int) -> bool:
+        with self._lock:
+            key = self._remove(player_id)
+            if key is None:
+                return False
+            self._maybe_rebuild(key)
+            self._dirty += 1
+            return True
+
+    def vector(self, player_id: int) -> np.ndarray:
+        with self._lock:
+            key, row = self._rows[player_id]
+            return self.partitions[key].vectors[row].copy()
+
+    def location(self, player_id: int) -> PartitionKey:
+        with self._lock:
+            return self._rows[player_id][0]
+
+    def query(self, vector: np.ndarray, k: int = 10, position: Optional[str] = None,
+              league: Optional[str] = None, exclude: Optional[int] = None) -> List[Dict[str, object]]:
+        """Return the k nearest players to a standardized vector within the filters"""
+        position = _normalize(position) if position else None
+        league = _normalize(league) if league else None
+        fetch = k + (1 if exclude is not None else 0)
+
+        candidates: List[Tuple[float, int, PartitionKey]] = []
+        with self._lock:
+            for key, partition in self.partitions.items():
+                if (position and key[0] != position) or (league and key[1] != league):
+                    continue
+                for distance, row in partition.search(vector, fetch):
+                    candidates.append((distance, int(partition.ids[row]), key))
+
+        candidates.sort()
+        results = []
+        for distance, player_id, key in candidates:
+            if player_id == exclude:
+                continue
+            results.append({
+                "player_id": player_id,
+                "distance": round(distance, 4),
+                "similarity": round(1.0 / (1.0 + distance), 4),
+                "position": key[0],
+                "league": key[1],
+            })
+            if len(results) == k:
+                break
+        return results
+
+    def neighbours(self, player_id: int, k: int = 10, position: Optional[str] = None,
+                   league: Optional[str] = None) -> List[Dict[str, object]]:
+        """k nearest players to an indexed player, excluding the player themselves"""
+        return self.query(self.vector(player_id), k=k, position=position, league=league, exclude=player_id)
+
+    def save(self):
+        """Write ids, raw features and partitions as .npy columns, swapped in atomically"""
+        if not self.path:
+            return
+        with self._lock:
+            keys = list(self.partitions)
+            ids, vectors, partitions = [], [], []
+            for number, key in enumerate(keys):
+                partition = self.partitions[key]
+                live = np.flatnonzero(partition.alive[:partition.size])
+                ids.append(partition.ids[live])
+                vectors.append(partition.vectors[live])
+                partitions.append(np.full(len(live), number, dtype=np.int32))
+            self._dirty = 0
+
+        dims = len(FEATURE_NAMES)
+        columns = {
+            "ids": np.concatenate(ids) if ids else np.empty(0, dtype=np.int64),
+            "features": (self.scaler.inverse_transform(np.concatenate(vectors)) if ids
+                         else np.empty((0, dims), dtype=np.float64)),
+            "partitions": np.concatenate(partitions) if ids else np.empty(0, dtype=np.int32),
+        }
+        parent = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = os.path.join(parent, f".{os.path.basename(self.path)}.{uuid.uuid4().hex}")
+        os.makedirs(tmp_path)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), values)
+        with open(os.path.join(tmp_path, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({"feature_names": FEATURE_NAMES, "partitions": keys, "players": len(columns["ids"])}, f)
+
+        if os.path.isdir(self.path):
+            old_path = f"{tmp_path}.old"
+            os.rename(self.path, old_path)
+            os.rename(tmp_path, self.path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.rename(tmp_path, self.path)
+        logger.info(f"Saved {len(columns['ids'])} players to similarity index {self.path}")
+
+    def load(self):
+        try:
+            with open(os.path.join(self.path, "index.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["feature_names"] != FEATURE_NAMES:
+                raise ValueError(f"feature layout changed: {meta['feature_names']}")
+            ids = np.load(os.path.join(self.path, "ids.npy"))
+            features = np.load(os.path.join(self.path, "features.npy"))
+            partitions = np.load(os.path.join(self.path, "partitions.npy"))
+        except (OSError, ValueError, KeyError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to load similarity index from {self.path}: {str(e)}")
+            return
+        keys = [tuple(key) for key in meta["partitions"]]
+        self.bulk_load(ids.tolist(), features, [keys[p][0] for p in partitions], [keys[p][1] for p in partitions])
+        with self._lock:
+            self._dirty = 0
+        logger.info(f"Loaded {len(ids)} players into similarity index from {self.path}")
+
+    def _remove(self, player_id: int) -> Optional[PartitionKey]:
+        """Tombstone a player's row and return the partition they left"""
+        location = self._rows.pop(player_id, None)
+        if location is None:
+            return None
+        key, row = location
+        partition = self.partitions[key]
+        partition.alive[row] = False
+        if row < partition.tree_size:
+            partition.dead += 1
+        return key
+
+    def _upsert_scaled(self, player_id: int, vector: np.ndarray, position: str,
+                       league: Optional[str], rebuild: bool = True) -> PartitionKey:
+        previous = self._remove(player_id)
+        key = (_normalize(position), _normalize(league))
+        partition = self.partitions.get(key)
+        if partition is None:
+            partition = self.partitions[key] = _Partition(len(FEATURE_NAMES))
+        self._rows[player_id] = (key, partition.append(player_id, vector))
+
+        if rebuild:
+            self._maybe_rebuild(key)
+            if previous is not None and previous != key:
+                self._maybe_rebuild(previous)
+        return key
+
+    def _maybe_rebuild(self, key: PartitionKey):
+        """Rebuild a partition whose delta or tombstone count has outgrown its tree"""
+        partition = self.partitions[key]
+        delta = partition.size - partition.tree_size
+        delta_limit = min(self.max_delta, max(self.min_delta, self.rebuild_ratio * partition.tree_size))
+        if delta > delta_limit or partition.dead > self.rebuild_ratio * max(partition.tree_size, 1):
+            self._rebuild(key)
+
+    def _rebuild(self, key: PartitionKey):
+        rows = self.partitions[key].rebuild()
+        for player_id, row in rows.items():
+            self._rows[player_id] = (key, row)
+        logger.debug(f"Rebuilt similarity partition {key} with {len(rows)} players")
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import sys
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_proxy import AnalysisProxyStore, probe_video, proxy_geometry
+
+
+def write_video(path, width, height, fps, frames):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for i in range(frames):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        frame[:, : (i * 7) % width] = 200
+        writer.write(frame)
+    writer.release()
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@pytest.fixture
+def proxies(tmp_path):
+    store = AnalysisProxyStore(str(tmp_path / 'proxies'), max_height=240, fps=15.0, use_ffmpeg=False)
+    yield store
+    store.shutdown()
+
+
+def test_proxy_geometry_keeps_aspect_and_even_sizes():
+    assert proxy_geometry(3840, 2160, 720) == {'width': 1280, 'height': 720}
+    assert proxy_geometry(641, 361, 720) == {'width': 640, 'height': 360}
+
+
+def test_upload_builds_downscaled_proxy(tmp_path, proxies):
+    source = tmp_path / 'clip.mp4'
+    digest = write_video(source, 960, 540, 30.0, 60)
+
+    assert proxies.submit(str(source), digest)['status'] == 'pending'
+    proxy = proxies.wait(digest, timeout=30)
+    assert proxy['status'] == 'ready'
+    assert (proxy['width'], proxy['height'], proxy['fps']) == (426, 240, 15.0)
+
+    info = probe_video(proxies.proxy_path(digest))
+    assert info['height'] == 240
+    assert info['fps'] == pytest.approx(15.0)
+    assert info['frames'] == pytest.approx(30, abs=1)
+
+
+def test_select_only_returns_proxy_that_covers_plan(tmp_path, proxies):
+    source = tmp_path / 'clip.mp4'
+    digest = write_video(source, 960, 540, 30.0, 30)
+    proxies.submit(str(source), digest)
+    proxies.wait(digest, timeout=30)
+
+    selected = proxies.select(str(source), max_height=240, fps=10.0)
+    assert selected['path'] == proxies.proxy_path(digest)
+    assert (selected['fps'], selected['source']['fps']) == (15.0, 30.0)
+    # A plan that needs more pixels or frames than the proxy keeps decodes the original
+    assert proxies.select(str(source), max_height=480, fps=10.0) is None
+    assert proxies.select(str(source), max_height=240, fps=25.0) is None
+    # Unknown files and files changed since upload are never mapped to a proxy
+    assert proxies.select(str(tmp_path / 'other.mp4'), 240, 10.0) is None
+    write_video(source, 960, 540, 30.0, 45)
+    assert proxies.select(str(source), 240, 10.0) is None
+
+
+def test_same_content_reuses_proxy(tmp_path, proxies):
+    source = tmp_path / 'clip.mp4'
+    digest = write_video(source, 960, 540, 30.0, 30)
+    proxies.submit(str(source), digest)
+    proxies.wait(digest, timeout=30)
+
+    copy = tmp_path / 'copy.mp4'
+    copy.write_bytes(source.read_bytes())
+    assert proxies.submit(str(copy), digest)['status'] == 'ready'
+    assert proxies.select(str(copy), 240, 10.0)['path'] == proxies.proxy_path(digest)
+
+    # The content index survives a restart
+    reopened = AnalysisProxyStore(proxies.directory, max_height=240, fps=15.0, use_ffmpeg=False)
+    assert reopened.content_hash(str(copy)) == digest
+    reopened.shutdown()
+
+
+def test_overwritten_upload_does_not_build_old_hash_from_new_content(tmp_path, proxies):
+    # Hold the single worker so both uploads are queued before either build runs
+    release = threading.Event()
+    proxies._executor.submit(release.wait)
+
+    source = tmp_path / 'clip.mp4'
+    old_digest = write_video(source, 960, 540, 30.0, 30)
+    proxies.submit(str(source), old_digest)
+    new_digest = write_video(source, 960, 540, 30.0, 45)
+    proxies.submit(str(source), new_digest)
+    release.set()
+
+    assert proxies.wait(old_digest, timeout=30)['status'] == 'failed'
+    assert proxies.wait(new_digest, timeout=30)['status'] == 'ready'
+    assert probe_video(proxies.proxy_path(new_digest))['frames'] == pytest.approx(23, abs=1)
+
+
+def test_queued_build_falls_back_to_another_copy(tmp_path, proxies):
+    release = threading.Event()
+    proxies._executor.submit(release.wait)
+
+    source, copy = tmp_path / 'clip.mp4', tmp_path / 'copy.mp4'
+    digest = write_video(source, 960, 540, 30.0, 30)
+    copy.write_bytes(source.read_bytes())
+    proxies.submit(str(source), digest)
+    proxies.register(str(copy), digest)
+    write_video(source, 960, 540, 30.0, 45)
+    release.set()
+
+    assert proxies.wait(digest, timeout=30)['status'] == 'ready'
+    assert probe_video(proxies.proxy_path(digest))['frames'] == pytest.approx(15, abs=1)
+
+
+def test_small_sources_need_no_proxy(tmp_path, proxies):
+    source = tmp_path / 'small.mp4'
+    digest = write_video(source, 320, 180, 15.0, 15)
+    proxies.submit(str(source), digest)
+    assert proxies.wait(digest, timeout=30)['status'] == 'not_needed'
+    assert proxies.select(str(source), 240, 10.0) is None
+
+
+def test_unreadable_upload_fails_cleanly(tmp_path, proxies):
+    source = tmp_path / 'broken.mp4'
+    source.write_bytes(b'not a video')
+    digest = hashlib.sha256(b'not a video').hexdigest()
+    proxies.submit(str(source), digest)
+    proxy = proxies.wait(digest, timeout=30)
+    assert proxy['status'] == 'failed'
+    assert not os.path.exists(proxies.proxy_path(digest))
+
+
+def test_status_rejects_invalid_hash(proxies):
+    with pytest.raises(ValueError):
+        proxies.status('../sources')
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution_plan import compile_execution_plan
+
+
+def test_comprehensive_plan_runs_only_pose():
+    plan = compile_execution_plan("comprehensive")
+    assert plan.stages == ["pose"]
+    assert plan.skipped_stages == []
+    assert not plan.runs("segmentation")
+    # Cheaper than the old full-rate pose + segmentation pipeline
+    assert plan.relative_cost < 1.0
+
+
+def test_lighter_analysis_types_cost_less():
+    quick = compile_execution_plan("quick")
+    comprehensive = compile_execution_plan("Comprehensive")
+    assert quick.pose_complexity == 0
+    assert quick.cost_per_second < comprehensive.cost_per_second
+
+
+def test_frame_stride_and_estimated_cost():
+    plan = compile_execution_plan("tactical", duration_seconds=60)
+    assert plan.frame_stride(30.0) == 3
+    assert plan.frame_stride(5.0) == 1
+    assert plan.estimated_cost == pytest.approx(plan.cost_per_second * 60, rel=1e-3)
+
+
+def test_unknown_analysis_type_rejected():
+    with pytest.raises(ValueError):
+        compile_execution_plan("everything")
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from landmark_store import LandmarkStore
+
+LANDMARK_NAMES = ['NOSE', 'LEFT_SHOULDER', 'RIGHT_SHOULDER', 'LEFT_HIP', 'RIGHT_HIP']
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LandmarkStore(str(tmp_path / 'landmarks'))
+    writer = store.writer('player-1', LANDMARK_NAMES)
+    for frame in range(100):
+        landmarks = np.full((len(LANDMARK_NAMES), 4), frame / 100, dtype=np.float32)
+        landmarks[:, 3] = 1.0
+        metrics = {'center_x': frame * 0.01, 'center_y': 0.5, 'shoulder_width': 0.2,
+                   'body_lean': 0.05, 'stability': 0.9}
+        writer.append(frame, frame / 25, landmarks, metrics)
+    writer.close(fps=25.0, source='clip.mp4')
+    return store
+
+
+def test_metadata_and_columns_are_memory_mapped(store):
+    meta = store.metadata('player-1')
+    assert meta['frames'] == 100
+    assert meta['landmark_names'] == LANDMARK_NAMES
+    columns = store._load('player-1')['columns']
+    assert isinstance(columns['landmarks_x'], np.memmap)
+    assert columns['landmarks_x'].dtype == np.float16
+    assert columns['speed'].dtype == np.float32
+
+
+def test_time_range_and_landmark_subset_query(store):
+    result = store.query('player-1', start=1.0, end=2.0, landmarks=['LEFT_HIP', '4'],
+                         components=['x', 'y'], metrics=['speed'])
+    assert result['frame'][0] == 25
+    assert result['frame'][-1] == 50
+    assert result['landmarks_x'].shape == (26, 2)
+    assert 'landmarks_z' not in result
+    assert set(result) == {'frame', 'timestamp', 'landmarks_x', 'landmarks_y', 'speed'}
+    assert result['speed'][1] == pytest.approx(0.01, abs=1e-4)
+
+
+def test_proxy_decoded_video_keeps_source_frame_indices(store):
+    # 15 fps proxy of a 30 fps source: every proxy frame maps to an even source frame
+    writer = store.writer('player-2', LANDMARK_NAMES)
+    for proxy_frame in range(3):
+        timestamp = proxy_frame / 15
+        writer.append(int(round(timestamp * 30)), timestamp, np.zeros((len(LANDMARK_NAMES), 4)), {})
+    writer.close(fps=30.0, source='clip.mp4', decoded_from={'path': 'proxies/abc.mp4', 'fps': 15.0})
+    meta = store.metadata('player-2')
+    assert meta['fps'] == 30.0
+    assert meta['decoded_from'] == {'path': 'proxies/abc.mp4', 'fps': 15.0}
+    assert list(store.query('player-2', start=0.1, end=0.2)['frame']) == [4]
+
+
+def test_rewrite_replaces_video_and_invalid_queries_raise(store):
+    writer = store.writer('player-1', LANDMARK_NAMES)
+    writer.append(0, 0.0, np.zeros((len(LANDMARK_NAMES), 4)), {})
+    writer.close(fps=25.0)
+    assert store.metadata('player-1')['frames'] == 1
+    assert store.list_videos() == ['player-1']
+
+    with pytest.raises(ValueError):
+        store.query('player-1', landmarks=['LEFT_KNEE'])
+    with pytest.raises(ValueError):
+        store.writer('../escape', LANDMARK_NAMES)
+    with pytest.raises(KeyError):
+        store.query('missing')
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+cv2 = pytest.importorskip("cv2")
+
+from live_analysis import FrameSource, LiveAnalysisManager, LiveAnalysisSession
+
+
+class FakeTracker:
+    """Stand-in for MotionTrackingData that avoids loading pose models."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def extract_frame_metrics(self, frame, frame_count):
+        time.sleep(self.delay)
+        return {'frame': frame_count, 'center_x': float(frame.mean()) / 255, 'center_y': 0.5}
+
+    def analyze_movement_patterns(self, movements):
+        if not movements:
+            return {}
+        return {'total_frames': len(movements), 'last_frame': movements[-1]['frame']}
+
+
+def write_video(path, frames=30, fps=30.0):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), fps, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), i * 8 % 255, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def test_replayed_video_fills_rolling_window(tmp_path):
+    video = write_video(tmp_path / 'replay.avi', frames=30)
+    session = LiveAnalysisSession('test', FrameSource(video, realtime=False), FakeTracker(),
+                                  window_seconds=0.5)
+    session.start()
+    assert session.wait(timeout=10)
+
+    result = session.get_result()
+    assert result['status'] == 'Completed'
+    assert result['frames_read'] == 30
+    assert result['frames_processed'] == 30
+    assert result['frames_dropped'] == 0
+    # Window holds half a second of frames at 30 fps
+    assert result['rolling_metrics']['total_frames'] == 15
+
+
+def test_slow_analyzer_drops_stale_frames(tmp_path):
+    video = write_video(tmp_path / 'replay.avi', frames=30, fps=100.0)
+    session = LiveAnalysisSession('test', FrameSource(video), FakeTracker(delay=0.05))
+    session.start()
+    assert session.wait(timeout=10)
+
+    result = session.get_result()
+    assert result['frames_dropped'] > 0
+    assert result['frames_processed'] < 30
+    assert result['rolling_metrics']['last_frame'] == 29
+
+
+def test_unreadable_source_raises(tmp_path):
+    trackers = []
+    manager = LiveAnalysisManager(lambda: trackers.append(FakeTracker()) or trackers[-1],
+                                  source_roots=[str(tmp_path)])
+    with pytest.raises(ValueError):
+        manager.start_session(str(tmp_path / 'missing.mp4'))
+    broken = tmp_path / 'broken.mp4'
+    broken.write_bytes(b'not a video')
+    with pytest.raises(ValueError):
+        manager.start_session(str(broken))
+    assert manager.sessions == {}
+    assert [tracker.closed for tracker in trackers] == [True]
+
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='named pipes are POSIX only')
+def test_pipe_without_writer_does_not_block_start(tmp_path):
+    pipe = tmp_path / 'feed.pipe'
+    os.mkfifo(pipe)
+    manager = LiveAnalysisManager(FakeTracker, source_roots=[str(tmp_path)])
+    started = time.monotonic()
+    session = manager.start_session(str(pipe))
+    assert time.monotonic() - started < 5
+    assert session.status == 'Active'
+
+    manager.stop_session(session.session_id)
+    # Hang up writers until OpenCV has tried every backend and the reader thread exits
+    deadline = time.monotonic() + 10
+    while not session.wait(timeout=0.2) and time.monotonic() < deadline:
+        try:
+            os.close(os.open(pipe, os.O_WRONLY | os.O_NONBLOCK))
+        except OSError:
+            pass
+    assert session.wait(timeout=0)
+    assert session.tracker is None
+
+
+def test_sources_outside_allowed_directories_are_rejected(tmp_path):
+    allowed = tmp_path / 'uploads'
+    allowed.mkdir()
+    outside = write_video(tmp_path / 'outside.avi', frames=5)
+    manager = LiveAnalysisManager(FakeTracker, source_roots=[str(allowed)])
+    for stream_url in ('rtsp://camera.local/stream', 'http://example.com/clip.mp4', outside,
+                       str(allowed / '..' / 'outside.avi')):
+        with pytest.raises(ValueError):
+            manager.start_session(stream_url)
+    assert manager.sessions == {}
+
+
+def test_finished_sessions_release_tracker_and_are_evicted(tmp_path):
+    video = write_video(tmp_path / 'replay.avi', frames=10)
+    manager = LiveAnalysisManager(FakeTracker, source_roots=[str(tmp_path)], finished_ttl=0.2)
+    session = manager.start_session(video, realtime=False)
+    tracker = session.tracker
+    assert session.wait(timeout=10)
+    assert session.status == 'Completed'
+    assert tracker.closed and session.tracker is None
+
+    # Still readable right after it ends, gone once the TTL has passed
+    assert manager.get_session(session.session_id) is session
+    time.sleep(0.3)
+    assert manager.get_session(session.session_id) is None
+
+
+@pytest.mark.asyncio
+async def test_subscribers_receive_updates_until_stopped(tmp_path):
+    video = write_video(tmp_path / 'replay.avi', frames=300)
+    manager = LiveAnalysisManager(FakeTracker, source_roots=[str(tmp_path)])
+    session = manager.start_session(video, loop=asyncio.get_running_loop())
+    queue = session.subscribe()
+
+    updates = []
+    while len(updates) < 5:
+        updates.append(await asyncio.wait_for(queue.get(), timeout=5))
+    await asyncio.to_thread(manager.stop_session, session.session_id)
+
+    while True:
+        update = await asyncio.wait_for(queue.get(), timeout=5)
+        if update['status'] != 'Active':
+            break
+    assert update['status'] == 'Stopped'
+    assert updates[-1]['frames_processed'] > 0
+    assert session.session_id not in manager.sessions
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_projection import MarketValueProjector
+
+
+def test_projection_is_reproducible_and_ordered():
+    projector = MarketValueProjector()
+    first = projector.project_one(20.0, age=20, peak_age=26, seed=[42, 7])
+    second = projector.project_one(20.0, age=20, peak_age=26, seed=[42, 7])
+    assert first == second
+    assert set(first) == {'1_year', '3_years', '5_years'}
+    for bands in first.values():
+        assert bands['p10'] < bands['p50'] < bands['p90']
+    # Uncertainty widens with the horizon
+    assert first['5_years']['p90'] - first['5_years']['p10'] > first['1_year']['p90'] - first['1_year']['p10']
+
+
+def test_young_players_appreciate_and_veterans_decline():
+    projector = MarketValueProjector()
+    quantiles = projector.project([10.0, 10.0], ages=[19, 31], peak_ages=[26, 26])
+    young, veteran = quantiles[:, :, 1]
+    assert young[-1] > 10.0
+    assert veteran[-1] < 10.0
+
+
+def test_batch_matches_shape_and_stays_fast():
+    projector = MarketValueProjector(n_paths=2000)
+    n = 500
+    start = time.perf_counter()
+    quantiles = projector.project(np.full(n, 25.0), np.full(n, 22.0), np.full(n, 27.0))
+    elapsed = time.perf_counter() - start
+    assert quantiles.shape == (n, 3, 3)
+    assert np.all(quantiles > 0)
+    assert elapsed < 5.0
+    assert quantiles[:, 1, 1].std() == pytest.approx(0.0, abs=2.0)
+
+
+def test_negative_seed_entries_are_accepted():
+    # /predict-talent seeds with [seed, player_id] and player ids may be negative
+    projector = MarketValueProjector(n_paths=200)
+    negative = projector.project_one(20.0, age=20, peak_age=26, seed=[42, -3])
+    assert negative == projector.project_one(20.0, age=20, peak_age=26, seed=[42, -3])
+    assert negative != projector.project_one(20.0, age=20, peak_age=26, seed=[42, 3])
+    assert projector.project([20.0], [20], [26], seed=-1).shape == (1, 3, 3)
+
+
+def test_player_seeds_make_bands_independent_of_the_batch():
+    projector = MarketValueProjector(n_paths=500)
+    alone = projector.project([20.0], [20], [26], player_seeds=[[42, 7]])[0]
+    batch = projector.project([5.0, 20.0, 30.0], [30, 20, 18], [26, 26, 27],
+                              player_seeds=[[42, 1], [42, 7], [42, -2]])
+    assert np.array_equal(batch[1], alone)
+    # Same numbers as the single-player path /predict-talent uses
+    assert projector.to_dict(alone) == projector.project_one(20.0, age=20, peak_age=26, seed=[42, 7])
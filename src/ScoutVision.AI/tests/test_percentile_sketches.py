@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from percentile_sketches import CohortPercentiles, TDigest
+
+
+def test_tdigest_quantiles_track_exact_values():
+    values = np.random.default_rng(3).normal(50, 10, 20000)
+    digest = TDigest()
+    for value in values:
+        digest.add(value)
+
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        assert digest.quantile(q) == pytest.approx(np.quantile(values, q), abs=0.5)
+    assert digest.cdf(np.quantile(values, 0.75)) == pytest.approx(0.75, abs=0.01)
+    assert len(digest.means) < 200
+
+
+def test_merged_digests_match_combined_population():
+    rng = np.random.default_rng(4)
+    left, right = rng.uniform(0, 10, 5000), rng.uniform(5, 15, 5000)
+    a, b = TDigest(), TDigest()
+    for value in left:
+        a.add(value)
+    for value in right:
+        b.add(value)
+    a.merge(b)
+
+    combined = np.concatenate([left, right])
+    assert a.count == 10000
+    assert a.quantile(0.5) == pytest.approx(np.median(combined), abs=0.2)
+
+
+def test_cohort_fallback_and_persistence(tmp_path):
+    path = str(tmp_path / 'sketches.json')
+    cohorts = CohortPercentiles(path, min_count=10, autosave_every=1000)
+    for score in range(100):
+        cohorts.record({'technical_score': score / 10}, 'Forward', 'Premier')
+    for score in range(5):
+        cohorts.record({'technical_score': score}, 'Defender', 'Premier')
+
+    assert cohorts.percentile('technical_score', 9.0, 'forward', 'premier') == pytest.approx(90, abs=2)
+    # Too few defenders: falls back to the league-wide cohort
+    assert cohorts.percentile('technical_score', 5.0, 'Defender', 'Premier') == pytest.approx(50, abs=4)
+    assert cohorts.percentile('unknown_metric', 1.0) is None
+
+    cohorts.save()
+    reloaded = CohortPercentiles(path, min_count=10)
+    assert reloaded.percentile('technical_score', 9.0, 'Forward', 'Premier') == \
+        cohorts.percentile('technical_score', 9.0, 'Forward', 'Premier')
+
+
+def test_cdf_uses_mid_rank_for_ties():
+    constant = TDigest()
+    for _ in range(40):
+        constant.add(5.0)
+    assert constant.cdf(5.0) == 0.5
+    assert constant.cdf(4.0) == 0.0 and constant.cdf(6.0) == 1.0
+
+    # Integer scores 0-9 in equal numbers: score s sits at (s + 0.5) / 10
+    scores = TDigest()
+    for value in np.repeat(np.arange(10), 400):
+        scores.add(float(value))
+    for score in (0, 5, 9):
+        assert scores.cdf(score) == pytest.approx((score + 0.5) / 10, abs=0.01)
+
+
+def test_constant_cohort_is_not_top_percentile():
+    cohorts = CohortPercentiles(min_count=30)
+    for _ in range(40):
+        cohorts.record({'mindset_score': 5.0})
+    assert cohorts.percentile('mindset_score', 5.0) == 50.0
@@ -0,0 +1,166 @@
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiling import ProfileStore, ProfilingMiddleware, RequestProfiler, SamplingProfiler, run_in_thread
+
+
+def busy_work(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(i * i for i in range(200))
+    return total
+
+
+def heavy_decode(seconds):
+    return busy_work(seconds)
+
+
+def make_client(tmp_path, token='secret', max_profiles=50):
+    profiler = RequestProfiler(ProfileStore(str(tmp_path / 'profiles'), max_profiles), token=token,
+                               sample_interval=0.001)
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @app.get('/work')
+    async def work():
+        return {'total': busy_work(0.05)}
+
+    @app.get('/analyze')
+    async def analyze():
+        return {'total': await run_in_thread(heavy_decode, 0.1)}
+
+    return TestClient(app), profiler
+
+
+def test_unprofiled_request_saves_nothing(tmp_path):
+    client, profiler = make_client(tmp_path)
+    response = client.get('/work')
+    assert response.status_code == 200
+    assert 'x-scoutvision-profile-id' not in response.headers
+    assert profiler.store.list() == []
+
+
+def test_disabled_without_token(tmp_path):
+    client, profiler = make_client(tmp_path, token=None)
+    response = client.get('/work', headers={'X-ScoutVision-Profile': 'cprofile',
+                                            'X-ScoutVision-Profile-Token': 'secret'})
+    assert 'x-scoutvision-profile-id' not in response.headers
+    assert not profiler.enabled
+
+
+def test_wrong_token_is_ignored(tmp_path):
+    client, profiler = make_client(tmp_path)
+    response = client.get('/work', headers={'X-ScoutVision-Profile': 'cprofile',
+                                            'X-ScoutVision-Profile-Token': 'wrong'})
+    assert response.status_code == 200
+    assert profiler.store.list() == []
+
+
+def test_cprofile_request_is_saved_as_pstats(tmp_path):
+    client, profiler = make_client(tmp_path)
+    response = client.get('/work', headers={'X-ScoutVision-Profile': 'cprofile',
+                                            'X-ScoutVision-Profile-Token': 'secret'})
+    profile_id = response.headers['x-scoutvision-profile-id']
+    [saved] = profiler.store.list()
+    assert saved['id'] == profile_id
+    assert saved['path'] == '/work' and saved['status_code'] == 200
+    stats = pstats.Stats(profiler.store.path(profile_id))
+    assert any(func[2] == 'busy_work' for func in stats.stats)
+
+
+def test_sampled_request_is_saved_as_speedscope(tmp_path):
+    client, profiler = make_client(tmp_path)
+    response = client.get('/work', headers={'X-ScoutVision-Profile': 'sample',
+                                            'X-ScoutVision-Profile-Token': 'secret'})
+    path = profiler.store.path(response.headers['x-scoutvision-profile-id'])
+    assert path.endswith('.speedscope.json')
+    with open(path) as f:
+        profile = json.load(f)
+    frame_names = [frame['name'] for frame in profile['shared']['frames']]
+    assert 'busy_work' in frame_names
+    [sampled] = profile['profiles']
+    assert sampled['type'] == 'sampled'
+    assert len(sampled['samples']) == len(sampled['weights'])
+
+
+def test_retention_keeps_newest_profiles(tmp_path):
+    client, profiler = make_client(tmp_path, max_profiles=2)
+    ids = [
+        client.get('/work', headers={'X-ScoutVision-Profile': 'cprofile',
+                                     'X-ScoutVision-Profile-Token': 'secret'}).headers['x-scoutvision-profile-id']
+        for _ in range(4)
+    ]
+    assert [profile['id'] for profile in profiler.store.list()] == ids[:1:-1]
+    assert profiler.store.path(ids[0]) is None
+    assert len(os.listdir(profiler.store.directory)) == 4
+
+
+def test_path_rejects_traversal(tmp_path):
+    store = ProfileStore(str(tmp_path / 'profiles'))
+    assert store.path('../secrets') is None
+
+
+def test_time_window_samples_all_threads(tmp_path):
+    profiler = RequestProfiler(ProfileStore(str(tmp_path / 'profiles')), token='secret', sample_interval=0.001)
+    with pytest.raises(ValueError):
+        profiler.start_window(1.0, mode='cprofile')
+    window = profiler.start_window(0.2)
+    assert window['mode'] == 'sample'
+    with pytest.raises(RuntimeError):
+        profiler.start_window(0.2)
+    busy_work(0.3)
+    deadline = time.time() + 5
+    while 'profile' not in (profiler.window or {}) and time.time() < deadline:
+        time.sleep(0.01)
+    assert profiler.window['profile']['format'] == 'speedscope'
+    assert profiler.window['profile']['window_seconds'] == 0.2
+
+
+def test_sampler_only_samples_selected_threads():
+    sampler = SamplingProfiler(0.001, thread_ids=[threading.get_ident()])
+    sampler.start()
+    busy_work(0.05)
+    sampler.stop()
+    assert set(sampler.samples) == {threading.get_ident()}
+
+
+@pytest.mark.parametrize('mode', ['cprofile', 'sample'])
+def test_worker_thread_work_is_captured(tmp_path, mode):
+    client, profiler = make_client(tmp_path)
+    response = client.get('/analyze', headers={'X-ScoutVision-Profile': mode,
+                                               'X-ScoutVision-Profile-Token': 'secret'})
+    path = profiler.store.path(response.headers['x-scoutvision-profile-id'])
+    [saved] = profiler.store.list()
+    assert saved['threads'] == 2
+
+    if mode == 'cprofile':
+        stats = pstats.Stats(path)
+        [entry] = [value for func, value in stats.stats.items() if func[2] == 'heavy_decode']
+        assert entry[3] >= 0.09  # cumulative time of the worker call
+    else:
+        with open(path) as f:
+            profile = json.load(f)
+        names = [frame['name'] for frame in profile['shared']['frames']]
+        heavy = names.index('heavy_decode')
+        worker_samples = sum(
+            weight for sampled in profile['profiles']
+            for stack, weight in zip(sampled['samples'], sampled['weights']) if heavy in stack
+        )
+        assert worker_samples >= 0.05
+
+
+def test_run_in_thread_without_capture_is_plain_to_thread(tmp_path):
+    client, profiler = make_client(tmp_path)
+    assert client.get('/analyze').status_code == 200
+    assert profiler.store.list() == []
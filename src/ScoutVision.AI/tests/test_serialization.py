@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serialization import decode_multipart, encode_multipart, negotiate, wants_binary
+
+
+def test_accept_header_negotiation():
+    assert not wants_binary(None)
+    assert not wants_binary('application/json')
+    assert not wants_binary('*/*')
+    assert wants_binary('multipart/mixed')
+    assert wants_binary('multipart/mixed, application/json;q=0.5')
+    assert not wants_binary('multipart/mixed;q=0.2, application/json')
+
+
+def test_multipart_round_trip_is_smaller_than_json():
+    series = {
+        'speed': np.random.default_rng(1).random(50000).astype(np.float32),
+        'frame': np.arange(50000, dtype=np.int32),
+    }
+    summary = {'player_id': 7, 'overall_score': 7.5}
+
+    body, content_type = encode_multipart(summary, series)
+    decoded_summary, decoded_series = decode_multipart(body, content_type)
+    assert decoded_summary == summary
+    np.testing.assert_array_equal(decoded_series['speed'], series['speed'])
+    assert decoded_series['frame'].dtype == np.int32
+
+    as_json = json.dumps({name: values.tolist() for name, values in series.items()})
+    assert len(body) < len(as_json) / 2
+
+
+def test_json_path_nests_series_under_key():
+    response = negotiate('application/json', {'motion_data': {'average_speed': 1.0}},
+                         {'speed': np.array([0.1, 0.2], dtype=np.float32)}, ('motion_data', 'series'))
+    payload = json.loads(response.body)
+    assert response.media_type == 'application/json'
+    assert payload['motion_data']['average_speed'] == 1.0
+    assert np.allclose(payload['motion_data']['series']['speed'], [0.1, 0.2])
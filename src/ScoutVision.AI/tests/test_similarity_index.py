@@ -0,0 +1,142 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.preprocessing import StandardScaler
+
+from similarity_index import FEATURE_NAMES, PlayerSimilarityIndex
+
+
+@pytest.fixture
+def population():
+    rng = np.random.default_rng(7)
+    raw = rng.random((2000, len(FEATURE_NAMES))) * 10
+    positions = rng.choice(['Forward', 'Midfielder', 'Defender'], size=len(raw))
+    leagues = rng.choice(['Premier', 'Championship'], size=len(raw))
+    scaler = StandardScaler().fit(raw)
+    return raw, positions, leagues, scaler
+
+
+def brute_force(index, raw, positions, leagues, target, k, position, league):
+    scaled = index.scaler.transform(raw)
+    mask = (positions == position) & (leagues == league)
+    mask[target] = False
+    dist = np.sqrt(((scaled - scaled[target]) ** 2).sum(axis=1))
+    dist[~mask] = np.inf
+    return list(np.argsort(dist)[:k])
+
+
+def test_neighbours_match_brute_force_within_filters(population):
+    raw, positions, leagues, scaler = population
+    index = PlayerSimilarityIndex(scaler)
+    index.bulk_load(range(len(raw)), raw, positions, leagues)
+
+    for target in (0, 17, 1234):
+        neighbours = index.neighbours(target, k=5, position=positions[target], league=leagues[target])
+        expected = brute_force(index, raw, positions, leagues, target, 5, positions[target], leagues[target])
+        assert [n['player_id'] for n in neighbours] == expected
+        assert all(n['position'] == positions[target].lower() for n in neighbours)
+
+
+def test_incremental_inserts_updates_and_removals(population):
+    raw, positions, leagues, scaler = population
+    index = PlayerSimilarityIndex(scaler, min_delta=8)
+    index.bulk_load(range(100), raw[:100], positions[:100], leagues[:100])
+
+    # Inserts land in the delta first, then trigger a rebuild
+    for player_id in range(100, 130):
+        features = dict(zip(FEATURE_NAMES, raw[player_id]))
+        index.upsert(player_id, features, positions[player_id], leagues[player_id])
+    assert len(index) == 130
+
+    # Moving a player to a twin of player 0 makes them its nearest neighbour
+    index.upsert(129, dict(zip(FEATURE_NAMES, raw[0])), positions[0], leagues[0])
+    nearest = index.neighbours(0, k=1)[0]
+    assert nearest['player_id'] == 129
+    assert nearest['distance'] == pytest.approx(0.0)
+
+    assert index.remove(129)
+    assert not index.remove(129)
+    assert all(n['player_id'] != 129 for n in index.neighbours(0, k=130))
+    assert len(index.neighbours(0, k=500)) == 128
+
+
+def test_tombstones_trigger_rebuilds_and_stay_exact(population):
+    raw, positions, leagues, scaler = population
+    index = PlayerSimilarityIndex(scaler)
+    ids = np.arange(len(raw))
+    index.bulk_load(ids, raw, np.full(len(raw), 'Forward'), np.full(len(raw), 'Premier'))
+    partition = index.partitions[('forward', 'premier')]
+
+    # Removing 10% of the partition rebuilds it instead of piling up tombstones
+    for player_id in range(201):
+        index.remove(player_id)
+    assert partition.dead == 0 and partition.tree_size == len(raw) - 201
+
+    # Moving players out rebuilds the partition they leave, not only the one they join
+    for player_id in range(201, 381):
+        index.upsert(player_id, dict(zip(FEATURE_NAMES, raw[player_id])), 'Defender', 'Premier')
+    assert partition.dead == 0 and partition.tree_size == len(raw) - 381
+
+    # Tombstones just under the threshold still give exact answers
+    for player_id in range(381, 500):
+        index.remove(player_id)
+    assert partition.dead == 119
+    remaining = np.arange(500, len(raw))
+    scaled = scaler.transform(raw[remaining])
+    target = scaled[0]
+    expected = remaining[np.argsort(np.sqrt(((scaled - target) ** 2).sum(axis=1)))[:10]]
+    assert [n['player_id'] for n in index.query(target, k=10, position='Forward')] == list(expected)
+
+
+def test_delta_is_capped(population):
+    raw, positions, leagues, scaler = population
+    index = PlayerSimilarityIndex(scaler, rebuild_ratio=1.0, min_delta=8, max_delta=16)
+    index.bulk_load(range(1000), raw[:1000], positions[:1000], np.full(1000, 'Premier'))
+    for player_id in range(1000, 1100):
+        index.upsert(player_id, dict(zip(FEATURE_NAMES, raw[player_id])), 'Forward', 'Premier')
+    partition = index.partitions[('forward', 'premier')]
+    assert partition.size - partition.tree_size <= 16
+
+
+def test_index_persists_raw_features_and_reloads(population, tmp_path):
+    raw, positions, leagues, scaler = population
+    path = str(tmp_path / 'similarity_index')
+    index = PlayerSimilarityIndex(scaler, path=path)
+    index.bulk_load(range(500), raw[:500], positions[:500], leagues[:500])
+    index.remove(3)
+    index.save()
+    expected = index.neighbours(0, k=5, position=positions[0], league=leagues[0])
+
+    reloaded = PlayerSimilarityIndex(scaler, path=path)
+    assert len(reloaded) == 499 and 3 not in reloaded
+    assert reloaded.location(0) == (positions[0].lower(), leagues[0].lower())
+    assert reloaded.neighbours(0, k=5, position=positions[0], league=leagues[0]) == expected
+
+    # Saving again replaces the previous snapshot
+    reloaded.upsert(1000, dict(zip(FEATURE_NAMES, raw[0])), positions[0], leagues[0])
+    reloaded.save()
+    assert 1000 in PlayerSimilarityIndex(scaler, path=path)
+    assert sorted(os.listdir(tmp_path)) == ['similarity_index']
+
+
+def test_concurrent_upserts_and_queries(population):
+    raw, positions, leagues, scaler = population
+    index = PlayerSimilarityIndex(scaler, min_delta=8)
+    index.bulk_load(range(200), raw[:200], positions[:200], leagues[:200])
+
+    def writer():
+        for player_id in range(200, 1000):
+            index.upsert(player_id, dict(zip(FEATURE_NAMES, raw[player_id])), positions[player_id], leagues[player_id])
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    while thread.is_alive():
+        assert len(index.neighbours(0, k=5)) == 5
+    thread.join()
+    assert len(index) == 1000
@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 import json
 import logging
+import os
+import uuid
 from typing import Dict, Any, List
 import aiohttp
 import websockets
@@ -14,6 +16,9 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="ScoutVision Bridge Service", version="1.0.0")
 
+# GMod server endpoint; point at mock_gmod_server.py for local testing
+GMOD_WS_URL = os.environ.get("GMOD_WS_URL", "ws://localhost:27015/gmod_api")
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,14 +33,16 @@ class GModBridge:
         self.active_sessions: Dict[str, Dict] = {}
         self.websocket_connections: List[WebSocket] = []
         self.gmod_connections: Dict[str, Any] = {}
+        self.gmod_readers: Dict[str, asyncio.Task] = {}
         
     async def start_gmod_session(self, session_config: Dict[str, Any]) -> str:
         """Start a new GMod visualization session"""
-        session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Random suffix keeps sessions started within the same second distinct
+        session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
         
         try:
             # Connect to GMod server
-            gmod_ws = await websockets.connect(f"ws://localhost:27015/gmod_api")
+            gmod_ws = await websockets.connect(GMOD_WS_URL)
             
             # Send initialization command
             init_command = {
@@ -50,10 +57,12 @@ class GModBridge:
                 "config": session_config,
                 "gmod_connection": gmod_ws,
                 "created_at": datetime.now(),
-                "status": "active"
+                "status": "active",
+                "acks": 0
             }
             
             self.gmod_connections[session_id] = gmod_ws
+            self.gmod_readers[session_id] = asyncio.create_task(self._read_gmod_messages(session_id, gmod_ws))
             
             logger.info(f"Started GMod session: {session_id}")
             return session_id
@@ -62,6 +71,16 @@ class GModBridge:
             logger.error(f"Failed to start GMod session: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to start GMod session: {str(e)}")
     
+    async def _read_gmod_messages(self, session_id: str, gmod_ws):
+        """Drain acknowledgements so unread replies never stall the GMod connection"""
+        try:
+            async for _ in gmod_ws:
+                session = self.active_sessions.get(session_id)
+                if session:
+                    session["acks"] += 1
+        except Exception as e:
+            logger.debug(f"GMod reader for {session_id} stopped: {str(e)}")
+    
     async def send_analytics_to_gmod(self, session_id: str, analytics_data: Dict[str, Any]) -> bool:
         """Send analytics data to GMod for visualization"""
         if session_id not in self.active_sessions:
@@ -106,6 +125,9 @@ class GModBridge:
             del self.active_sessions[session_id]
             if session_id in self.gmod_connections:
                 del self.gmod_connections[session_id]
+            reader = self.gmod_readers.pop(session_id, None)
+            if reader:
+                reader.cancel()
                 
             logger.info(f"Stopped GMod session: {session_id}")
             return True
@@ -144,6 +166,7 @@ async def get_active_sessions():
             "session_id": session_id,
             "created_at": session_data["created_at"].isoformat(),
             "status": session_data["status"],
+            "acks": session_data["acks"],
             "config": session_data["config"]
         })
     return {"sessions": sessions}
@@ -0,0 +1,219 @@
+"""
+Load generator for the ScoutVision bridge service.
+
+Starts a number of GMod sessions through /api/gmod/start-session, then drives
+analytics updates through the /ws/bridge WebSocket or /api/gmod/send-data at a
+fixed per-session rate. Updates are sent on schedule without waiting for
+earlier replies, and latency is measured from each update's scheduled send
+time, so a slow bridge shows up in p99 instead of silently lowering the rate
+(coordinated omission). It reports throughput, the rate each session actually
+achieved and p50/p99 latency, then stops the sessions. By default an in-process mock GMod server is started, so the
+report also includes end-to-end latency from client send to GMod receipt.
+
+Usage:
+    python bridge_service.py &                    # GMOD_WS_URL defaults to the mock's port
+    python load_generator.py --sessions 20 --rate 50 --duration 30 --mode ws
+
+Pass --no-mock to drive a bridge that talks to a separately started
+mock_gmod_server.py or a real GMod server; end-to-end latency is then unavailable.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+import aiohttp
+
+from mock_gmod_server import MockGModServer
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, Optional[float]]:
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+    return {
+        "count": len(samples),
+        "p50_ms": ms(percentile(samples, 50)),
+        "p99_ms": ms(percentile(samples, 99)),
+        "max_ms": ms(max(samples) if samples else None),
+    }
+
+
+class BridgeLoadGenerator:
+    def __init__(self, bridge_url: str, sessions: int, rate: float, duration: float, mode: str = "ws"):
+        self.bridge_url = bridge_url.rstrip("/")
+        self.sessions = sessions
+        self.rate = rate
+        self.duration = duration
+        self.mode = mode
+        self.sent = 0
+        self.acknowledged = 0
+        self.errors = 0
+        self.round_trip: List[float] = []
+        self.end_to_end: List[float] = []
+        self.acknowledged_by_session: Counter = Counter()
+
+    def on_gmod_message(self, message: Dict[str, Any], received_at: float):
+        """Mock GMod hook: measure client send -> GMod receipt for our own updates"""
+        data = message.get("data") or {}
+        if message.get("action") == "update_visualization" and "sent_at" in data:
+            self.end_to_end.append(received_at - data["sent_at"])
+
+    def _payload(self, session_id: str, seq: int, started: float) -> Dict[str, Any]:
+        # sent_at is the scheduled send time, so latency includes any delay in sending
+        return {"seq": seq, "sent_at": self._due(seq, started), "session": session_id,
+                "metrics": {"speed": 7.5, "stamina": 0.82, "x": 0.5, "y": 0.25}}
+
+    def _due(self, seq: int, started: float) -> float:
+        return started + seq / self.rate
+
+    def _record_reply(self, session_id: str, success: bool):
+        if success:
+            self.acknowledged += 1
+            self.acknowledged_by_session[session_id] += 1
+        else:
+            self.errors += 1
+
+    async def _pace(self, seq: int, started: float) -> bool:
+        """Sleep until the next scheduled send; False once the run is over"""
+        due = self._due(seq, started)
+        now = time.perf_counter()
+        if now - started >= self.duration:
+            return False
+        if due > now:
+            await asyncio.sleep(due - now)
+        return True
+
+    async def _drive_ws(self, http: aiohttp.ClientSession, session_id: str, started: float):
+        ws_url = self.bridge_url.replace("http", "ws", 1) + "/ws/bridge"
+        pending: Deque[float] = deque()
+        async with http.ws_connect(ws_url) as ws:
+            async def receive():
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    response = json.loads(msg.data)
+                    if pending:
+                        self.round_trip.append(time.perf_counter() - pending.popleft())
+                    self._record_reply(session_id, bool(response.get("success")))
+
+            receiver = asyncio.ensure_future(receive())
+            await self._send_ws(ws, session_id, started, pending)
+            # Give in-flight replies a moment to arrive
+            deadline = time.perf_counter() + 5
+            while pending and time.perf_counter() < deadline:
+                await asyncio.sleep(0.01)
+            receiver.cancel()
+
+    async def _send_ws(self, ws, session_id: str, started: float, pending: Deque[float]):
+        seq = 0
+        while await self._pace(seq, started):
+            payload = self._payload(session_id, seq, started)
+            pending.append(payload["sent_at"])
+            await ws.send_str(json.dumps({"type": "sync_request", "session_id": session_id, "data": payload}))
+            self.sent += 1
+            seq += 1
+
+    async def _drive_http(self, http: aiohttp.ClientSession, session_id: str, started: float):
+        in_flight = set()
+        seq = 0
+        while await self._pace(seq, started):
+            # Don't wait for the previous reply: a slow bridge must not slow the schedule
+            task = asyncio.ensure_future(self._post_http(http, session_id, self._payload(session_id, seq, started)))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            self.sent += 1
+            seq += 1
+        # Give in-flight replies a moment to arrive
+        if in_flight:
+            await asyncio.wait(set(in_flight), timeout=5)
+            for task in list(in_flight):
+                task.cancel()
+
+    async def _post_http(self, http: aiohttp.ClientSession, session_id: str, payload: Dict[str, Any]):
+        try:
+            async with http.post(f"{self.bridge_url}/api/gmod/send-data/{session_id}", json=payload) as resp:
+                result = await resp.json()
+            self.round_trip.append(time.perf_counter() - payload["sent_at"])
+            self._record_reply(session_id, bool(result.get("success")))
+        except aiohttp.ClientError:
+            self.errors += 1
+
+    async def run(self) -> Dict[str, Any]:
+        async with aiohttp.ClientSession() as http:
+            session_ids = []
+            for i in range(self.sessions):
+                async with http.post(f"{self.bridge_url}/api/gmod/start-session",
+                                     json={"load_test": True, "index": i}) as resp:
+                    resp.raise_for_status()
+                    session_ids.append((await resp.json())["session_id"])
+
+            drive = self._drive_ws if self.mode == "ws" else self._drive_http
+            started = time.perf_counter()
+            await asyncio.gather(*(drive(http, session_id, started) for session_id in session_ids))
+            elapsed = time.perf_counter() - started
+
+            for session_id in session_ids:
+                async with http.delete(f"{self.bridge_url}/api/gmod/stop-session/{session_id}") as resp:
+                    await resp.read()
+
+        achieved = [self.acknowledged_by_session[session_id] / elapsed if elapsed else 0.0
+                    for session_id in session_ids]
+
+        return {
+            "mode": self.mode,
+            "sessions": self.sessions,
+            "target_rate_per_session": self.rate,
+            "achieved_rate_per_session": {
+                "min": round(min(achieved), 1) if achieved else None,
+                "mean": round(sum(achieved) / len(achieved), 1) if achieved else None,
+                "max": round(max(achieved), 1) if achieved else None,
+            },
+            "elapsed_s": round(elapsed, 3),
+            "sent": self.sent,
+            "acknowledged": self.acknowledged,
+            "errors": self.errors,
+            "messages_per_second": round(self.acknowledged / elapsed, 1) if elapsed else 0.0,
+            "round_trip": summarize(self.round_trip),
+            "end_to_end": summarize(self.end_to_end),
+        }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load generator for the ScoutVision bridge service")
+    parser.add_argument("--bridge-url", default="http://localhost:8080")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=20.0, help="messages per second per session")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to send for")
+    parser.add_argument("--mode", choices=["ws", "http"], default="ws")
+    parser.add_argument("--no-mock", action="store_true", help="use an already running GMod (or mock) server")
+    parser.add_argument("--mock-port", type=int, default=27015)
+    args = parser.parse_args()
+
+    generator = BridgeLoadGenerator(args.bridge_url, args.sessions, args.rate, args.duration, args.mode)
+    mock = None
+    if not args.no_mock:
+        mock = MockGModServer(port=args.mock_port, on_message=generator.on_gmod_message)
+        await mock.start()
+    try:
+        report = await generator.run()
+        if mock:
+            report["gmod"] = mock.stats()
+        print(json.dumps(report, indent=2))
+    finally:
+        if mock:
+            await mock.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
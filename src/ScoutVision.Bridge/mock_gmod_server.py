@@ -0,0 +1,108 @@
+"""
+Mock GMod WebSocket server for exercising the bridge service without Garry's Mod.
+
+Accepts the bridge's init_session, update_visualization and stop_session
+commands on ws://localhost:27015/gmod_api, records every message with its
+arrival time and replies with an acknowledgement.
+
+Usage:
+    python mock_gmod_server.py [--host localhost] [--port 27015] [--no-ack]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, Optional, Set
+
+import websockets
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KNOWN_ACTIONS = {"init_session", "update_visualization", "stop_session"}
+
+
+class MockGModServer:
+    def __init__(self, host: str = "localhost", port: int = 27015, ack: bool = True,
+                 max_records: int = 100000, on_message: Optional[Callable[[Dict[str, Any], float], None]] = None):
+        self.host = host
+        self.port = port
+        self.ack = ack
+        self.on_message = on_message
+        self.records: Deque[Dict[str, Any]] = deque(maxlen=max_records)
+        self.counts: Counter = Counter()
+        self.sessions: Set[str] = set()
+        self._server = None
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        logger.info(f"Mock GMod server listening on ws://{self.host}:{self.port}/gmod_api")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, websocket, path=None):
+        async for raw in websocket:
+            received_at = time.perf_counter()
+            try:
+                message = json.loads(raw)
+            except json.JSONDecodeError:
+                self.counts["invalid"] += 1
+                continue
+
+            action = message.get("action", "unknown")
+            session_id = message.get("session_id")
+            self.counts[action if action in KNOWN_ACTIONS else "unknown"] += 1
+            if action == "init_session":
+                self.sessions.add(session_id)
+            elif action == "stop_session":
+                self.sessions.discard(session_id)
+
+            self.records.append({"action": action, "session_id": session_id, "received_at": received_at})
+            if self.on_message:
+                self.on_message(message, received_at)
+
+            if self.ack:
+                try:
+                    await websocket.send(json.dumps({
+                        "type": "ack",
+                        "action": action,
+                        "session_id": session_id,
+                        "received_at": received_at
+                    }))
+                except websockets.exceptions.ConnectionClosed:
+                    # The bridge closes right after stop_session
+                    break
+
+    def stats(self) -> Dict[str, Any]:
+        return {"counts": dict(self.counts), "active_sessions": len(self.sessions)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Mock GMod WebSocket server for the bridge service")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=27015)
+    parser.add_argument("--no-ack", action="store_true", help="record messages without acknowledging them")
+    args = parser.parse_args()
+
+    server = MockGModServer(args.host, args.port, ack=not args.no_ack)
+    await server.start()
+    try:
+        while True:
+            await asyncio.sleep(10)
+            logger.info(f"Mock GMod stats: {server.stats()}")
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
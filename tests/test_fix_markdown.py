@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fix_markdown
+
+# MD036 turns the emphasis into a heading only after MD022 has already run
+UNSTABLE_AFTER_ONE_PASS = "text\n**Bold**\n\n\nnext\n"
+
+
+def test_rules_are_applied_until_the_text_settles():
+    fixed = fix_markdown.fix_markdown_content(UNSTABLE_AFTER_ONE_PASS)
+    assert fixed == "text\n\n## Bold\n\nnext\n"
+    assert fix_markdown.fix_markdown_content(fixed) == fixed
+
+
+def test_cached_files_are_really_clean(tmp_path, capsys):
+    doc = tmp_path / "README.md"
+    doc.write_text(UNSTABLE_AFTER_ONE_PASS, encoding="utf-8")
+
+    assert fix_markdown.main([str(tmp_path), "--workers", "1"]) == 0
+    # A cached file must agree with an uncached check
+    assert fix_markdown.main([str(tmp_path), "--check", "--workers", "1"]) == 0
+    assert fix_markdown.main([str(tmp_path), "--check", "--no-cache", "--workers", "1"]) == 0
+    assert "Needs fixing" not in capsys.readouterr().out